@@ -100,13 +100,15 @@ class robot:
         self.v_angular = v_angular[2]
 
     def move(self, v_left, v_right):
-        self.sim.set_joint_target_velocity(self.motor_handle[0], v_left)
-        self.sim.set_joint_target_velocity(self.motor_handle[1], v_right)
+        with self.sim.batch():
+            self.sim.set_joint_target_velocity(self.motor_handle[0], v_left)
+            self.sim.set_joint_target_velocity(self.motor_handle[1], v_right)
 
     ## stop all motors
     def stop(self):
-        for motor in self.motor_handle:
-            self.sim.set_joint_target_velocity(motor, 0)
+        with self.sim.batch():
+            for motor in self.motor_handle:
+                self.sim.set_joint_target_velocity(motor, 0)
 
     ## drive our robot
     def drive(self, v_linear, v_angular):
@@ -1,17 +1,45 @@
+from contextlib import contextmanager
+import json
+from time import time
 import vrep
+import profiler
 
 # response values
 ERROR = -1
 OK = 1
 
+# object names group data type (see simxGetObjectGroupData)
+GROUP_NAMES = 0
+
 class simulator:
-    def __init__(self, ip, port):
+    ##
+    ##  -> profile:         profile remote API commands (no cost when off);
+    ##  -> profile_path:    .jsonl file of dumped profiles (None prints them);
+    ##
+    def __init__(self, ip, port, profile=False, profile_path=None):
         self.id = -1
         self.ip = ip
         self.port = port
 
+        # object handles keyed by scene and name, kept across reconnects
+        self.handles = {}
+        self.scene_id = ERROR
+
+        # batched commands counters
+        self.batching = False
+        self.batch_commands = 0
+        self.flushes = 0
+        self.flushed_commands = 0
+        self.last_flush = 0
+
+        # remote API commands profile, kept across reconnects
+        self.profile = profiler.profile() if profile else None
+        self.profile_path = profile_path
+
     def connect(self):
         self.id = vrep.simxStart(self.ip, self.port, True, True, 2000, 5)
+        if self.profile is not None and self.id != ERROR:
+            profiler.register(self.id, self.profile)
         vrep.simxSynchronous(self.id, True)
 
         if self.id == ERROR:
@@ -22,27 +50,120 @@ class simulator:
     def disconnect(self):
         if self.id is not ERROR:
             vrep.simxFinish(self.id)
+            if self.profile is not None:
+                profiler.unregister(self.id)
+
+    ## return commands profile and connection values, None when not profiling
+    def get_profile(self):
+        if self.profile is None:
+            return None
+
+        report = {'port': self.port, 'seconds': time() - self.profile.start_time,
+                  'commands': self.profile.report()}
+        report.update(profiler.client_info(self.id))
+        return report
+
+    ## write (or print) the profile since the last dump and start again
+    def dump_profile(self):
+        report = self.get_profile()
+        if report is None:
+            return
+
+        if self.profile_path is not None:
+            with open(self.profile_path, 'a') as f:
+                f.write(json.dumps(report) + '\n')
+        else:
+            profiler.print_report(report)
+        self.profile.reset()
 
     def pause(self):
         if self.id is not ERROR:
-            vrep.simxPauseCommunication(self.id, 0)
+            vrep.simxPauseCommunication(self.id, 1)
 
     def resume(self):
         if self.id is not ERROR:
-            vrep.simxPauseCommunication(self.id, 1)
+            vrep.simxPauseCommunication(self.id, 0)
+
+    ## queue every command sent inside the block and send them as one packet
+    @contextmanager
+    def batch(self):
+        if self.batching:
+            yield self
+            return
+
+        self.pause()
+        self.batching = True
+        self.batch_commands = 0
+        try:
+            yield self
+        finally:
+            self.batching = False
+            self.resume()
+            self.flushes += 1
+            self.flushed_commands += self.batch_commands
+            self.last_flush = self.batch_commands
+
+    def count_command(self):
+        if self.batching:
+            self.batch_commands += 1
+
+    ## return how many commands were sent in batches
+    def get_batch_stats(self):
+        average = self.flushed_commands / float(self.flushes) if self.flushes else 0
+        return {'flushes': self.flushes, 'commands': self.flushed_commands,
+                'last': self.last_flush, 'average': average}
 
     def update(self):
         if self.id is not ERROR:
             vrep.simxSynchronousTrigger(self.id)
 
+    ## return id of the scene on the server, changed whenever a scene is loaded
+    def get_scene_id(self):
+        status, scene_id = vrep.simxGetInMessageInfo(self.id, vrep.simx_headeroffset_scene_id)
+
+        return scene_id if status is not ERROR else ERROR
+
+    ## resolve every object handle of current scene
+    def load_handles(self):
+        # names and handles of every object in a single call
+        status, handles, _, _, names = vrep.simxGetObjectGroupData(self.id, \
+            vrep.sim_appobj_object_type, GROUP_NAMES, vrep.simx_opmode_blocking)
+
+        # handles are then resolved one by one
+        if status != vrep.simx_return_ok:
+            return
+
+        # drop handles of other scenes
+        scene_id = self.get_scene_id()
+        if scene_id != self.scene_id:
+            self.handles.clear()
+            self.scene_id = scene_id
+
+        for name, handle in zip(names, handles):
+            self.handles[(scene_id, name)] = int(handle)
+
     def get_handle(self, name):
-        status, handle = vrep.simxGetObjectHandle(self.id, name, \
-            vrep.simx_opmode_oneshot_wait)
+        if (self.get_scene_id(), name) not in self.handles:
+            self.load_handles()
 
-        if status is ERROR:
-            raise Exception('Unable to receive handle!')
+        # scene id is only known once a reply is received (e.g. by
+        # load_handles on a fresh connection)
+        key = (self.get_scene_id(), name)
+
+        # fall back to a single query for names not listed by the scene
+        if key not in self.handles:
+            status, handle = vrep.simxGetObjectHandle(self.id, name, \
+                vrep.simx_opmode_oneshot_wait)
+
+            if status != vrep.simx_return_ok:
+                raise Exception('Unable to receive handle!')
+
+            self.handles[key] = handle
+
+        return self.handles[key]
 
-        return handle
+    def get_handles(self, names):
+        return [self.get_handle(name) for name in names]
 
     def init_prox_sensor(self, handle):
         status, state, coord, _, _ = vrep.simxReadProximitySensor(self.id, \
@@ -101,6 +222,7 @@ class simulator:
         return pos
 
     def set_joint_target_velocity(self, handle, v):
+        self.count_command()
         if self.id is not ERROR:
             vrep.simxSetJointTargetVelocity(self.id, handle, v, \
                                                 vrep.simx_opmode_streaming)
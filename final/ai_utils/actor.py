@@ -10,12 +10,15 @@ from keras.initializers import VarianceScaling
 from keras.layers import Dense, Flatten, Input, Lambda, Activation
 from keras.models import Model
 
+from .target_update import target_update_op
+
 H_LAYER1 = 400
 H_LAYER2 = 300
 
 class actor_network:
+    ## (inference builds the helper network only, to act)
     def __init__(self, sess, state_dim, action_dim, batch_size=64, tau=.001,
-        lr=.001):
+        lr=.001, inference=False):
         self.sess = sess
 
         self.state_dim = state_dim
@@ -29,6 +32,12 @@ class actor_network:
 
         # create models
         self.helper, self.weights, self.state = self.build_network()
+        self.target = None
+        if inference:
+            self.sess.run(tf.variables_initializer(self.helper.weights))
+            print('~*~*~>actor network created (inference only)!')
+            return
+
         self.target, self.target_weights, self.target_state = self.build_network()
 
         # policy update gradients
@@ -38,7 +47,13 @@ class actor_network:
 
         grads = zip(self.params_grad, self.weights)
 
-        self.optimize = tf.train.AdamOptimizer(self.lr).apply_gradients(grads)
+        # (the optimizer is shared with fused_update)
+        self.optimizer = tf.train.AdamOptimizer(self.lr)
+        self.optimize = self.optimizer.apply_gradients(grads)
+
+        # soft target update, blended in graph
+        self.target_tau, self.target_update = target_update_op(self.helper,
+            self.target)
 
         # set things up
         self.sess.run(tf.global_variables_initializer())
@@ -50,7 +65,8 @@ class actor_network:
     def load_weights(self, path):
         try:
             self.helper.load_weights(path+"/actor.h5")
-            self.target.load_weights(path+"/actor.h5")
+            if self.target is not None:
+                self.target.load_weights(path+"/actor.h5")
 
             print('Loading weights for actor network.')
         except:
@@ -71,15 +87,10 @@ class actor_network:
 
     ##   apply training on our target network, to slowly converge with our
     ##  actor network
-    def target_train(self):
-        weights = self.helper.get_weights()
-        target_weights = self.target.get_weights()
-
-        for i in range(len(weights)):
-            target_weights[i] = self.tau*weights[i] + \
-                                            (1 - self.tau)*target_weights[i]
-
-        self.target.set_weights(target_weights)
+    def target_train(self, tau=None):
+        self.sess.run(self.target_update, feed_dict={
+            self.target_tau: self.tau if tau is None else tau
+        })
 
     ## build our network
     def build_network(self):
@@ -0,0 +1,144 @@
+##
+## checkpoints of the whole training state (every session variable, including
+## target networks and optimizers state, counters and replay buffer),
+## snapshot in memory and written on a background thread
+##
+
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# checkpoint directories are PREFIX + version, written as TMP_PREFIX + version
+# and renamed when complete
+PREFIX = 'ckpt-'
+TMP_PREFIX = 'tmp-'
+
+class checkpoint_manager:
+    ##
+    ##  -> path:    directory of the versioned checkpoints;
+    ##  -> keep:    newest checkpoints kept, older ones are removed (None
+    ##              keeps every checkpoint);
+    ##
+    def __init__(self, path, keep=3):
+        if keep is not None and keep < 1:
+            raise ValueError('At least one checkpoint must be kept!')
+
+        self.path = path
+        self.keep = keep
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        # checkpoints left incomplete by a crash
+        for name in os.listdir(path):
+            if name.startswith(TMP_PREFIX):
+                shutil.rmtree(os.path.join(path, name))
+
+        latest = self.versions()
+        self.version = latest[-1] if latest else 0
+
+        # one snapshot written at a time, save() waits for the previous one
+        self.snapshots = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self.write_snapshots)
+        self.thread.daemon = True
+        self.thread.start()
+
+    ## versions of complete checkpoints, oldest first
+    def versions(self):
+        return sorted(int(name[len(PREFIX):]) for name in os.listdir(self.path)
+                      if name.startswith(PREFIX))
+
+    def directory(self, version, prefix=PREFIX):
+        return os.path.join(self.path, prefix + '%06d' % version)
+
+    ## snapshot every session variable, counters (json values) and buffer,
+    ## to be written on the background thread
+    def save(self, sess, counters, buff=None):
+        import tensorflow as tf
+
+        variables = tf.global_variables()
+        values = sess.run(variables)
+        weights = dict((v.name, value) for v, value in zip(variables, values))
+        buffer_state = buff.get_state() if buff is not None else {}
+
+        self.version += 1
+        self.snapshots.put((self.version, weights, dict(counters), buffer_state))
+
+    ## restore the newest checkpoint, returning its counters (None when there
+    ## is no checkpoint); every variable (optimizers state included) must
+    ## be created before, so the next update starts from the checkpoint
+    def restore(self, sess, buff=None):
+        latest = self.versions()
+        if not latest:
+            return None
+
+        directory = self.directory(latest[-1])
+        with open(os.path.join(directory, 'state.json')) as f:
+            state = json.load(f)
+
+        with np.load(os.path.join(directory, 'weights.npz')) as f:
+            weights = dict((name, f['arr_%d' % i]) for i, name in enumerate(state['variables']))
+        missing = self.load_variables(sess, weights)
+        if missing:
+            print('Checkpoint variables not restored: ' + ', '.join(sorted(missing)))
+
+        if buff is not None:
+            with np.load(os.path.join(directory, 'buffer.npz')) as f:
+                buff.set_state(dict((name, f[name]) for name in f.files))
+
+        print('Restored checkpoint ' + directory + '.')
+        return state['counters']
+
+    ## load variables of the session by name, returning the ones not found
+    def load_variables(self, sess, weights):
+        import tensorflow as tf
+
+        missing = dict(weights)
+        for variable in tf.global_variables():
+            if variable.name in missing:
+                variable.load(missing.pop(variable.name), sess)
+
+        return missing
+
+    def write_snapshots(self):
+        while True:
+            version, weights, counters, buffer_state = self.snapshots.get()
+            self.write(version, weights, counters, buffer_state)
+            self.snapshots.task_done()
+
+    ## write a checkpoint on a temporary directory, rename it when complete
+    ## and remove the oldest ones
+    def write(self, version, weights, counters, buffer_state):
+        tmp_directory = self.directory(version, TMP_PREFIX)
+        if os.path.exists(tmp_directory):
+            shutil.rmtree(tmp_directory)
+        os.makedirs(tmp_directory)
+
+        names = sorted(weights)
+        np.savez(os.path.join(tmp_directory, 'weights.npz'), *[weights[name] for name in names])
+        np.savez(os.path.join(tmp_directory, 'buffer.npz'), **buffer_state)
+        with open(os.path.join(tmp_directory, 'state.json'), 'w') as f:
+            json.dump({'version': version, 'counters': counters, 'variables': names}, f)
+
+        # a checkpoint of the same version (left by a run not restored from
+        # it) is replaced
+        directory = self.directory(version)
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp_directory, directory)
+
+        if self.keep is not None:
+            for old_version in self.versions()[:-self.keep]:
+                shutil.rmtree(self.directory(old_version))
+
+    ## wait until every snapshot is written
+    def wait(self):
+        self.snapshots.join()
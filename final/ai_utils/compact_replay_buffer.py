@@ -0,0 +1,150 @@
+##
+## implementation of a compact replay buffer memory: each observation is
+## stored once, as a frame shared by the transition that leaves it and the
+## one that reaches it, optionally quantized to float16 or scaled int16
+##
+
+import numpy as np
+
+from .replay_buffer import replay_buffer
+
+INT16_MAX = 32767
+
+class compact_replay_buffer(replay_buffer):
+    STATE = ['head', 'count', 'a', 'r', 'done', 'frames', 's_frame', 'new_s_slot',
+             'frames_written', 'recent', 'recent_frame', 'recent_head']
+
+    ##
+    ##  -> frames:  frames stored, by default 10% more than transitions to
+    ##              hold the first state of every episode;
+    ##  -> dtype:   frames storage, 'float32', 'float16' or 'int16';
+    ##  -> bound:   largest absolute state value on 'int16' storage;
+    ##  -> streams: robots storing their transitions interleaved;
+    ##
+    def __init__(self, batch_size, seed=1337, size=10000, frames=None,
+        dtype='float32', bound=10., streams=1):
+        replay_buffer.__init__(self, batch_size, seed, size)
+
+        if dtype not in ['float32', 'float16', 'int16']:
+            raise Exception('Unknown replay buffer storage type!')
+
+        self.frames_size = frames if frames else int(1.1*size) + 2
+        self.dtype = dtype
+        self.scale = bound/INT16_MAX
+        self.streams = streams
+
+        # frames are numbered by write order, frame n is kept at
+        # n % frames_size until frames_size newer ones are written
+        self.frames = None
+        self.frames_written = 0
+
+    def allocate(self, state_dim, action_dim):
+        replay_buffer.allocate(self, state_dim, action_dim)
+
+        # states are frames now, transitions only keep the number of their
+        # first frame (to know when it is lost) and the slot of the next one
+        self.s = None
+        self.new_s = None
+        self.frames = np.zeros((self.frames_size, state_dim), self.dtype)
+        self.s_frame = np.zeros(self.size, np.int64)
+        self.new_s_slot = np.zeros(self.size, np.int32)
+
+        # quantized storage keeps actions on half precision as well
+        if self.dtype != 'float32':
+            self.a = np.zeros((self.size, action_dim), np.float16)
+
+        # last next states of each stream, to find where a transition
+        # continues the previous one of its robot
+        self.recent = np.zeros((self.streams, state_dim), np.float32)
+        self.recent_frame = np.full(self.streams, -1, np.int64)
+        self.recent_head = 0
+
+    ## bytes used by stored transitions
+    def memory_usage(self):
+        if self.frames is None:
+            return 0
+        arrays = [self.a, self.r, self.done, self.frames, self.s_frame, self.new_s_slot]
+        return sum(array.nbytes for array in arrays)
+
+    ## write a state on the next frame, evicting the oldest transitions that
+    ## used the frame overwritten
+    def store_frame(self, state):
+        n = self.frames_written
+
+        if self.dtype == 'int16':
+            state = np.clip(np.rint(np.divide(state, self.scale)), -INT16_MAX, INT16_MAX)
+        self.frames[n % self.frames_size] = state
+        self.frames_written += 1
+
+        lost = n - self.frames_size
+        while self.count > 0 and self.s_frame[(self.head - self.count) % self.size] <= lost:
+            self.count -= 1
+
+        return n
+
+    ## decode frames to float32 states
+    def decode(self, slots, out):
+        out[:] = self.frames[slots]
+        if self.dtype == 'int16':
+            out *= self.scale
+        return out
+
+    def get_batch(self):
+        n = min(self.count, self.batch_size)
+
+        # only the last count transitions are stored, and the few of them
+        # (of interleaved robots) whose first frame was lost are drawn again
+        lost = self.frames_written - self.frames_size - 1
+        indices = self.random.randint(0, self.count, n)
+        indices = (self.head - self.count + indices) % self.size
+        invalid = np.flatnonzero(self.s_frame[indices] <= lost)
+        while len(invalid):
+            redraw = self.random.randint(0, self.count, len(invalid))
+            indices[invalid] = (self.head - self.count + redraw) % self.size
+            invalid = invalid[self.s_frame[indices[invalid]] <= lost]
+
+        s = self.decode(self.s_frame[indices] % self.frames_size, self.s_batch[:n])
+        a = self.a_batch[:n]
+        a[:] = self.a[indices]
+        r = np.take(self.r, indices, out=self.r_batch[:n])
+        new_s = self.decode(self.new_s_slot[indices], self.new_s_batch[:n])
+        done = np.take(self.done, indices, out=self.done_batch[:n])
+
+        return s, a, r, new_s, done
+
+    def store(self, s, a, r, new_s, done):
+        if self.frames is None:
+            self.allocate(np.size(s), np.size(a))
+
+        s = np.reshape(s, -1)
+        new_s = np.reshape(new_s, -1)
+
+        # continue on the frame of the previous next state of the robot, or
+        # start a new episode on a new frame
+        lost = self.frames_written - self.frames_size
+        match = np.flatnonzero((self.recent == s).all(axis=1) & (self.recent_frame > lost))
+        if len(match):
+            s_frame = self.recent_frame[match[-1]]
+        else:
+            s_frame = self.store_frame(s)
+        new_s_frame = self.store_frame(new_s)
+
+        self.recent[self.recent_head] = new_s
+        self.recent_frame[self.recent_head] = new_s_frame
+        self.recent_head = (self.recent_head + 1) % self.streams
+
+        i = self.head
+        self.s_frame[i] = s_frame
+        self.new_s_slot[i] = new_s_frame % self.frames_size
+        self.a[i] = a
+        self.r[i] = r
+        self.done[i] = done
+
+        self.head = (i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        replay_buffer.clear(self)
+        if self.frames is not None:
+            self.recent_frame[:] = -1
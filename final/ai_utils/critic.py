@@ -9,7 +9,8 @@ import keras.backend as K
 from keras.initializers import VarianceScaling
 from keras.layers import Dense, Flatten, Input, Lambda, Activation, add
 from keras.models import Model
-from keras.optimizers import Adam
+
+from .target_update import target_update_op
 
 H_LAYER1 = 400
 H_LAYER2 = 300
@@ -35,6 +36,22 @@ class critic_network:
         # policy update gradients
         self.action_gradients = tf.gradients(self.helper.output, self.actions)
 
+        # critic update, minimizing the (importance weighted) squared TD
+        # error; the optimizer is shared with fused_update
+        self.y = tf.placeholder(tf.float32, [None, 1])
+        self.sample_weights = tf.placeholder_with_default(
+            tf.ones_like(self.y[:, 0]), [None])
+        self.td_errors = tf.reshape(self.y - self.helper.output, [-1])
+        self.loss = tf.reduce_mean(self.sample_weights*tf.square(self.td_errors))
+
+        self.optimizer = tf.train.AdamOptimizer(self.lr)
+        self.optimize = self.optimizer.minimize(self.loss,
+            var_list=self.helper.trainable_weights)
+
+        # soft target update, blended in graph
+        self.target_tau, self.target_update = target_update_op(self.helper,
+            self.target)
+
         # set things up
         self.sess.run(tf.global_variables_initializer())
 
@@ -57,6 +74,15 @@ class critic_network:
 
         print('Saving weights for critic network.')
 
+    ## train our critic towards y, returning the loss
+    def train(self, states, actions, y, weights=None):
+        feed_dict = {self.state: states, self.actions: actions, self.y: y}
+        if weights is not None:
+            feed_dict[self.sample_weights] = weights
+
+        _, loss = self.sess.run([self.optimize, self.loss], feed_dict=feed_dict)
+        return loss
+
     ## get our gradients for policy update
     def gradients(self, states, actions):
         return self.sess.run(self.action_gradients, feed_dict={
@@ -66,15 +92,10 @@ class critic_network:
 
     ##   apply training on our target network, to slowly converge with our
     ##  critic network
-    def target_train(self):
-        weights = self.helper.get_weights()
-        target_weights = self.target.get_weights()
-
-        for i in range(len(weights)):
-            target_weights[i] = self.tau*weights[i] + \
-                                            (1 - self.tau)*target_weights[i]
-
-        self.target.set_weights(target_weights)
+    def target_train(self, tau=None):
+        self.sess.run(self.target_update, feed_dict={
+            self.target_tau: self.tau if tau is None else tau
+        })
 
     ## build our network
     def build_network(self):
@@ -90,7 +111,6 @@ class critic_network:
         V = Dense(1, activation='linear')(h3)
 
         model = Model(inputs=[S, A], outputs=V)
-        model.compile(loss='mse', optimizer=Adam(lr=self.lr))
 
         return model, A, S
 
@@ -0,0 +1,76 @@
+##
+## implementation of a whole DDPG update as one training op: target Q, critic
+## step, actor step and soft target updates run on a single session call
+##
+
+import tensorflow as tf
+
+class fused_update:
+    def __init__(self, sess, actor, critic, gamma=.99):
+        self.sess = sess
+
+        global_variables = set(tf.global_variables())
+
+        # minibatch of transitions, and importance sampling weights
+        self.s = tf.placeholder(tf.float32, [None, actor.state_dim])
+        self.a = tf.placeholder(tf.float32, [None, actor.action_dim])
+        self.r = tf.placeholder(tf.float32, [None])
+        self.new_s = tf.placeholder(tf.float32, [None, actor.state_dim])
+        self.weights = tf.placeholder_with_default(tf.ones_like(self.r), [None])
+
+        # y = r + gamma*Q'(s', mu'(s')), as ddpg.update (episodes ending on a
+        # stuck or fallen robot are not treated as terminal)
+        target_q = critic.target([self.new_s, actor.target(self.new_s)])
+        y = tf.stop_gradient(tf.reshape(self.r, [-1, 1]) + gamma*target_q)
+
+        # critic step, minimizing the (weighted) squared TD error
+        q = critic.helper([self.s, self.a])
+        self.td_errors = tf.reshape(y - q, [-1])
+        self.loss = tf.reduce_mean(self.weights*tf.square(self.td_errors))
+        self.q_mean = tf.reduce_mean(q)
+        self.q_max = tf.reduce_max(q)
+
+        # optimizers of the networks, so both update paths share their state
+        critic_step = critic.optimizer.minimize(self.loss,
+            var_list=critic.helper.trainable_weights)
+
+        # actor step on the updated critic, following the summed policy
+        # gradient as actor.train
+        with tf.control_dependencies([critic_step]):
+            policy_q = critic.helper([self.s, actor.helper(self.s)])
+            actor_step = actor.optimizer.minimize(-tf.reduce_sum(policy_q),
+                var_list=actor.helper.trainable_weights)
+
+        self.step = actor_step
+
+        # soft target updates after both steps
+        self.tau = tf.placeholder(tf.float32, [])
+        with tf.control_dependencies([actor_step]):
+            updates = []
+            for network in [actor, critic]:
+                for w, t in zip(network.helper.weights, network.target.weights):
+                    updates += [t.assign(self.tau*w + (1 - self.tau)*t)]
+            self.step_and_targets = tf.group(*updates)
+
+        # initialize new variables only (if any), networks and optimizers
+        # keep their state
+        new_variables = [v for v in tf.global_variables() if v not in global_variables]
+        self.sess.run(tf.variables_initializer(new_variables))
+
+    ## one update on a minibatch, with soft target updates when tau is given,
+    ## returns the critic loss, mean and max Q and TD errors
+    def train(self, s, a, r, new_s, weights=None, tau=None):
+        feed_dict = {self.s: s, self.a: a, self.r: r, self.new_s: new_s}
+        if weights is not None:
+            feed_dict[self.weights] = weights
+
+        if tau is None:
+            step = self.step
+        else:
+            step = self.step_and_targets
+            feed_dict[self.tau] = tau
+
+        _, loss, q_mean, q_max, td_errors = self.sess.run([step, self.loss,
+            self.q_mean, self.q_max, self.td_errors], feed_dict=feed_dict)
+
+        return loss, q_mean, q_max, td_errors
@@ -0,0 +1,121 @@
+##
+## implementation of the replay buffer memory on memory mapped files, so
+## previous interactions outlive training runs and may not fit in RAM
+##
+
+import json
+import os
+
+import numpy as np
+
+from .replay_buffer import replay_buffer
+
+# header file, with everything needed to reopen the arrays
+HEADER = 'header.json'
+ARRAYS = ['s', 'a', 'r', 'new_s', 'done']
+
+class memmap_replay_buffer(replay_buffer):
+    def __init__(self, batch_size, path, seed=1337, size=10000, dtype='float32'):
+        replay_buffer.__init__(self, batch_size, seed, size)
+
+        self.path = path
+        self.dtype = dtype
+
+        # reopen the buffer of a previous run, if there is one
+        if os.path.exists(os.path.join(path, HEADER)):
+            self.open()
+
+    ## map arrays of a previous run, without reading them
+    def open(self):
+        with open(os.path.join(self.path, HEADER)) as f:
+            header = json.load(f)
+
+        if header['capacity'] != self.size:
+            raise Exception('Replay buffer capacity does not match the saved one!')
+
+        self.dtype = header['dtype']
+        self.map_arrays('r+', header['state_dim'], header['action_dim'])
+        self.head = header['head']
+        self.count = header['count']
+
+    ## create (or open) one file per array on our path
+    def map_arrays(self, mode, state_dim, action_dim):
+        shapes = {'s': (self.size, state_dim), 'a': (self.size, action_dim),
+                  'r': (self.size, ), 'new_s': (self.size, state_dim),
+                  'done': (self.size, )}
+
+        for name in ARRAYS:
+            dtype = bool if name == 'done' else self.dtype
+            array = np.memmap(os.path.join(self.path, name + '.dat'), dtype,
+                              mode, shape=shapes[name])
+            setattr(self, name, array)
+
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+
+        # batches are small, so they stay in RAM
+        self.s_batch = np.zeros((self.batch_size, state_dim), self.dtype)
+        self.a_batch = np.zeros((self.batch_size, action_dim), self.dtype)
+        self.r_batch = np.zeros(self.batch_size, self.dtype)
+        self.new_s_batch = np.zeros((self.batch_size, state_dim), self.dtype)
+        self.done_batch = np.zeros(self.batch_size, bool)
+
+    ## create files on the first store
+    def allocate(self, state_dim, action_dim):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        self.map_arrays('w+', state_dim, action_dim)
+        self.flush()
+
+    ## write pending pages and the header, replaced at once so a crash
+    ## leaves the previous header
+    def flush(self):
+        if self.s is None:
+            return
+
+        for name in ARRAYS:
+            getattr(self, name).flush()
+
+        header = {'head': self.head, 'count': self.count,
+                  'capacity': self.size, 'dtype': self.dtype,
+                  'state_dim': self.state_dim, 'action_dim': self.action_dim}
+        tmp_path = os.path.join(self.path, HEADER + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(header, f)
+        os.rename(tmp_path, os.path.join(self.path, HEADER))
+
+    ## header of the buffer, after writing pending pages: checkpoints refer
+    ## to our files instead of copying them (transitions stored after the
+    ## checkpoint are kept by the files, and may overwrite some of its ones)
+    def get_state(self):
+        if self.s is None:
+            return {}
+
+        self.flush()
+        return {'dims': np.array([self.state_dim, self.action_dim]),
+                'head': np.array(self.head), 'count': np.array(self.count)}
+
+    ## restore the header of a checkpoint on our files
+    def set_state(self, state):
+        if 'dims' not in state:
+            return
+
+        if self.s is None:
+            raise Exception('Replay buffer files of the checkpoint are missing!')
+
+        state_dim, action_dim = [int(dim) for dim in state['dims']]
+        if (self.state_dim, self.action_dim) != (state_dim, action_dim):
+            raise Exception('Replay buffer files do not match the checkpoint!')
+
+        count = int(state['count'])
+        if count > self.size:
+            raise Exception('Replay buffer capacity is smaller than the checkpoint one!')
+
+        self.head = int(state['head'])
+        self.count = count
+        self.flush()
+
+    def clear(self):
+        replay_buffer.clear(self)
+        self.flush()
@@ -0,0 +1,114 @@
+##
+## timers of every training stage and a sink of per-episode (or per-report)
+## records, on JSON lines or CSV
+##
+
+import csv
+import json
+from contextlib import contextmanager
+from time import time
+
+import numpy as np
+
+class metrics:
+    ##
+    ##  -> path:            .jsonl or .csv file of records (None keeps none);
+    ##  -> stages:          stages timed, in columns order;
+    ##  -> print_interval:  minimum seconds between printed reports (None
+    ##                      never prints);
+    ##
+    def __init__(self, path=None, stages=(), print_interval=0.):
+        self.path = path
+        self.stages = list(stages)
+        self.print_interval = print_interval
+        self.last_print = None
+
+        # durations of each stage since the last record
+        self.durations = dict((stage, []) for stage in self.stages)
+
+        self.file = None
+        self.writer = None
+
+    ## time a block as a stage
+    @contextmanager
+    def time(self, stage):
+        start_time = time()
+        yield
+        self.add(stage, time() - start_time)
+
+    def add(self, stage, seconds):
+        if stage not in self.durations:
+            self.stages += [stage]
+            self.durations[stage] = []
+        self.durations[stage] += [seconds]
+
+    ## count, total seconds, p50 and p99 (milliseconds) of every stage
+    def summary(self):
+        summary = {}
+        for stage in self.stages:
+            durations = self.durations[stage]
+            if durations:
+                p50, p99 = np.percentile(durations, [50, 99]) * 1e3
+            else:
+                p50, p99 = 0., 0.
+            summary[stage] = (len(durations), float(np.sum(durations)), p50, p99)
+        return summary
+
+    ## write a record, along with stages statistics, and start timing again
+    def write(self, record):
+        record = dict(record)
+        for stage, (count, total, p50, p99) in self.summary().items():
+            record[stage + '_count'] = count
+            record[stage + '_total_s'] = total
+            record[stage + '_p50_ms'] = p50
+            record[stage + '_p99_ms'] = p99
+        record = dict((k, v.item() if isinstance(v, np.generic) else v)
+                      for k, v in record.items())
+
+        if self.path is not None:
+            self.write_record(record)
+
+        for stage in self.stages:
+            self.durations[stage] = []
+
+        return record
+
+    def write_record(self, record):
+        if self.file is None:
+            self.file = open(self.path, 'a')
+
+        if self.path.endswith('.csv'):
+            # columns are fixed by the first record
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.file, list(record),
+                                             extrasaction='ignore')
+                if self.file.tell() == 0:
+                    self.writer.writeheader()
+            self.writer.writerow(record)
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    ## if a report may be printed now (rate limited by print_interval)
+    def should_print(self):
+        if self.print_interval is None:
+            return False
+
+        now = time()
+        if self.last_print is not None and now - self.last_print < self.print_interval:
+            return False
+        self.last_print = now
+        return True
+
+    ## print p50/p99 of every stage of a record returned by write
+    def print_stages(self, record):
+        for stage in self.stages:
+            if record.get(stage + '_count'):
+                print('\t%-12s p50 %8.3f ms  p99 %8.3f ms  (%d)' % (stage.upper(),
+                      record[stage + '_p50_ms'], record[stage + '_p99_ms'],
+                      record[stage + '_count']))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -7,4 +7,6 @@ import numpy as np
 
 class ou:
     def apply(self, x, mu=0., theta=.15, sigma=.2):
-        return theta * (mu - x) + sigma * np.random.randn(1)
+        # one sample per robot (a row of a batch of actions), shared by its
+        # actions as on a single robot
+        return theta * (mu - x) + sigma * np.random.randn(*(np.shape(x)[:-1] + (1, )))
@@ -0,0 +1,66 @@
+##
+## forward pass of the ACTOR network on numpy, for acting without a session
+## (same layers as actor_network: relu hidden layers and a tanh output)
+##
+
+import numpy as np
+
+class numpy_actor:
+    ##
+    ##  -> weights:     actor weights, in get_weights() order (kernel and bias
+    ##                  of each layer);
+    ##  -> batch_size:  rows of the preallocated activations, grown on demand;
+    ##
+    def __init__(self, weights, batch_size=1):
+        self.weights = [np.array(w, np.float32) for w in weights]
+        self.layers = list(zip(self.weights[0::2], self.weights[1::2]))
+
+        self.state_dim = self.layers[0][0].shape[0]
+        self.action_dim = self.layers[-1][0].shape[1]
+        self.allocate(batch_size)
+
+    ## load new actor weights, in place
+    def refresh(self, weights):
+        for w, new_w in zip(self.weights, weights):
+            w[...] = new_w
+
+    ## write weights and layers metadata on a single .npz file
+    def save(self, path, dtype='float32'):
+        arrays = {'weight%d' % i: w.astype(dtype) for i, w in enumerate(self.weights)}
+        np.savez(path, layers=len(self.layers), state_dim=self.state_dim,
+                 action_dim=self.action_dim, hidden='relu', output='tanh', **arrays)
+
+    ## preallocate activations of every layer
+    def allocate(self, batch_size):
+        self.batch_size = batch_size
+        self.activations = [np.zeros((batch_size, kernel.shape[1]), np.float32)
+                            for kernel, _ in self.layers]
+
+    ## actions for a batch of states, valid until the next call
+    def predict(self, states):
+        x = np.reshape(np.asarray(states, np.float32), (-1, self.state_dim))
+        n = len(x)
+        if n > self.batch_size:
+            self.allocate(n)
+
+        last = len(self.layers) - 1
+        for i, (kernel, bias) in enumerate(self.layers):
+            h = self.activations[i][:n]
+            np.dot(x, kernel, out=h)
+            h += bias
+            if i < last:
+                np.maximum(h, 0, out=h)
+            else:
+                np.tanh(h, out=h)
+            x = h
+
+        return x
+
+## load an actor written by numpy_actor.save
+def load_policy(path, batch_size=1):
+    with np.load(path) as f:
+        weights = [f['weight%d' % i] for i in range(2*int(f['layers']))]
+        if str(f['hidden']) != 'relu' or str(f['output']) != 'tanh':
+            raise Exception('Unknown policy activations!')
+
+    return numpy_actor(weights, batch_size)
@@ -0,0 +1,189 @@
+##
+## samples the next minibatches of a replay buffer on a background thread,
+## while the current update and robot steps run
+##
+
+import threading
+from time import time
+
+import numpy as np
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+class prefetcher:
+    ##
+    ##  -> buff:    replay buffer sampled (any of ai_utils);
+    ##  -> depth:   minibatches assembled ahead;
+    ##
+    def __init__(self, buff, depth=2):
+        self.buff = buff
+        self.batch_size = buff.batch_size
+        self.depth = depth
+
+        # store and get_batch of the buffer never run at the same time
+        self.lock = threading.Lock()
+        self.filled = threading.Event()
+        self.stop = threading.Event()
+
+        # slots are filled by the thread, handed over through the ready queue
+        # and given back on the next get_batch (so the last batch stays valid)
+        self.slots = None
+        self.free = queue.Queue()
+        self.ready = queue.Queue(maxsize=depth)
+        self.current = None
+
+        # exception which stopped the thread, raised again by get_batch
+        self.error = None
+
+        # time get_batch waited on the thread
+        self.batches = 0
+        self.stalls = 0
+        self.stall_time = 0.
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def count(self):
+        return self.buff.count
+
+    ## contiguous float32 arrays of every slot (one more than depth is being
+    ## filled and one more is in use)
+    def allocate(self, s, a):
+        state_dim = s.shape[1]
+        action_dim = a.shape[1]
+        self.slots = []
+        for i in range(self.depth + 2):
+            self.slots += [{'s': np.zeros((self.batch_size, state_dim), np.float32),
+                            'a': np.zeros((self.batch_size, action_dim), np.float32),
+                            'r': np.zeros(self.batch_size, np.float32),
+                            'new_s': np.zeros((self.batch_size, state_dim), np.float32),
+                            'done': np.zeros(self.batch_size, bool),
+                            'indices': None, 'weights': None}]
+            self.free.put(i)
+
+    def run(self):
+        try:
+            self.prefetch()
+        except Exception as e:
+            self.error = e
+
+    def prefetch(self):
+        # wait until there is a whole batch to sample
+        while not self.filled.wait(timeout=.1):
+            if self.stop.is_set():
+                return
+
+        with self.lock:
+            s, a, _, _, _ = self.buff.get_batch()
+        self.allocate(s, a)
+
+        while not self.stop.is_set():
+            try:
+                i = self.free.get(timeout=.1)
+            except queue.Empty:
+                continue
+
+            self.fill(self.slots[i])
+
+            while not self.stop.is_set():
+                try:
+                    self.ready.put(i, timeout=.1)
+                    break
+                except queue.Full:
+                    pass
+
+    ## sample a minibatch and copy it on a slot
+    def fill(self, slot):
+        with self.lock:
+            s, a, r, new_s, done = self.buff.get_batch()
+
+            n = len(r)
+            slot['n'] = n
+            slot['s'][:n] = s
+            slot['a'][:n] = a
+            slot['r'][:n] = r
+            slot['new_s'][:n] = new_s
+            slot['done'][:n] = done
+
+            # prioritized buffers, to match TD errors with their batch
+            if getattr(self.buff, 'last_indices', None) is not None:
+                slot['indices'] = np.copy(self.buff.last_indices)
+                slot['weights'] = np.copy(self.buff.last_weights)
+
+    ## next prefetched minibatch, valid until the following call
+    def get_batch(self):
+        start_time = time()
+        try:
+            i = self.ready.get_nowait()
+        except queue.Empty:
+            self.stalls += 1
+            i = self.wait_batch()
+        self.stall_time += time() - start_time
+        self.batches += 1
+
+        if self.current is not None:
+            self.free.put(self.current)
+        self.current = i
+
+        slot = self.slots[i]
+        n = slot['n']
+        return slot['s'][:n], slot['a'][:n], slot['r'][:n], slot['new_s'][:n], slot['done'][:n]
+
+    ## wait for the thread, raising its exception if it failed
+    def wait_batch(self):
+        while True:
+            try:
+                return self.ready.get(timeout=.1)
+            except queue.Empty:
+                pass
+
+            if self.error is not None:
+                raise self.error
+            if not self.thread.is_alive():
+                raise Exception('Prefetching thread is stopped!')
+
+    @property
+    def last_weights(self):
+        return self.slots[self.current]['weights']
+
+    ## set priorities of the last batch returned, not of the last one sampled
+    def update_priorities(self, td_errors):
+        with self.lock:
+            self.buff.last_indices = self.slots[self.current]['indices']
+            self.buff.update_priorities(td_errors)
+
+    def store(self, s, a, r, new_s, done):
+        with self.lock:
+            self.buff.store(s, a, r, new_s, done)
+        if self.buff.count > self.batch_size:
+            self.filled.set()
+
+    def flush(self):
+        with self.lock:
+            self.buff.flush()
+
+    def get_state(self):
+        with self.lock:
+            return self.buff.get_state()
+
+    def set_state(self, state):
+        with self.lock:
+            self.buff.set_state(state)
+        if self.buff.count > self.batch_size:
+            self.filled.set()
+
+    def memory_usage(self):
+        return self.buff.memory_usage()
+
+    ## return number of batches, stalls and seconds waiting on the thread
+    def get_stats(self):
+        return self.batches, self.stalls, self.stall_time
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
@@ -0,0 +1,105 @@
+##
+## implementation of the prioritized replay buffer memory [1], which samples
+## previous interactions proportionally to their TD errors
+##
+## [1] https://arxiv.org/pdf/1511.05952.pdf
+##
+
+import numpy as np
+
+from .replay_buffer import replay_buffer
+
+class prioritized_replay_buffer(replay_buffer):
+    STATE = replay_buffer.STATE + ['tree', 'max_priority', 'beta']
+
+    ##
+    ##  -> alpha:   how much prioritization is used (0 is uniform);
+    ##  -> beta:    importance sampling correction, annealed up to 1;
+    ##  -> eps:     minimum priority, so every transition can be sampled;
+    ##
+    def __init__(self, batch_size, seed=1337, size=10000,
+        alpha=.6, beta=.4, beta_increment=1e-5, eps=1e-6):
+        replay_buffer.__init__(self, batch_size, seed, size)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+
+        # sum-tree on an array: node i has children 2i and 2i + 1, the root
+        # is 1 and leaves (one per transition) start at self.leaves
+        self.leaves = 1
+        while self.leaves < size:
+            self.leaves *= 2
+        self.depth = int(np.log2(self.leaves))
+        self.tree = np.zeros(2*self.leaves, np.float64)
+
+        self.max_priority = 1.
+
+        # indices and importance sampling weights of the last batch
+        self.last_indices = None
+        self.last_weights = None
+
+    ## set leaves priorities and update their ancestors, level by level
+    def set_priorities(self, indices, priorities):
+        nodes = np.asarray(indices) + self.leaves
+        self.tree[nodes] = priorities
+
+        # (repeated nodes just write the same sum twice)
+        for _ in range(self.depth):
+            nodes //= 2
+            self.tree[nodes] = self.tree[2*nodes] + self.tree[2*nodes + 1]
+
+    ## sample a minibatch (with replacement) proportionally to priorities
+    def get_batch(self):
+        n = min(self.count, self.batch_size)
+
+        # one target per equal segment of the total priority, then every
+        # target goes down the tree at once
+        total = self.tree[1]
+        targets = (np.arange(n) + self.random.uniform(size=n)) * (total/n)
+        nodes = np.ones(n, np.int64)
+        for _ in range(self.depth):
+            left = 2*nodes
+            left_values = self.tree[left]
+            right = targets >= left_values
+            targets -= left_values*right
+            nodes = left + right
+        indices = np.minimum(nodes - self.leaves, self.count - 1)
+
+        # importance sampling weights, normalized by the largest one
+        probabilities = self.tree[indices + self.leaves] / total
+        weights = (self.count*probabilities) ** -self.beta
+        self.last_weights = (weights / weights.max()).astype(np.float32)
+        self.last_indices = indices
+        self.beta = min(self.beta + self.beta_increment, 1.)
+
+        s = np.take(self.s, indices, axis=0, out=self.s_batch[:n])
+        a = np.take(self.a, indices, axis=0, out=self.a_batch[:n])
+        r = np.take(self.r, indices, out=self.r_batch[:n])
+        new_s = np.take(self.new_s, indices, axis=0, out=self.new_s_batch[:n])
+        done = np.take(self.done, indices, out=self.done_batch[:n])
+
+        return s, a, r, new_s, done
+
+    ## set priorities of the last batch from its TD errors
+    def update_priorities(self, td_errors):
+        priorities = (np.abs(np.reshape(td_errors, -1)) + self.eps) ** self.alpha
+        self.set_priorities(self.last_indices, priorities)
+        self.max_priority = max(self.max_priority, priorities.max())
+
+    def store(self, s, a, r, new_s, done):
+        # new transitions get the highest priority, so they are seen at least once
+        node = self.head + self.leaves
+        replay_buffer.store(self, s, a, r, new_s, done)
+
+        self.tree[node] = self.max_priority
+        node //= 2
+        while node:
+            self.tree[node] = self.tree[2*node] + self.tree[2*node + 1]
+            node //= 2
+
+    def clear(self):
+        replay_buffer.clear(self)
+        self.tree[:] = 0
+        self.max_priority = 1.
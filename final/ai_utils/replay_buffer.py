@@ -3,43 +3,103 @@
 ## which stores previous interactions
 ##
 
-from collections import deque
-
-import random
 import numpy as np
 
 class replay_buffer:
+    # attributes kept by get_state
+    STATE = ['head', 'count', 's', 'a', 'r', 'new_s', 'done']
+
     def __init__(self, batch_size, seed=1337, size=10000):
         self.size = size
         self.batch_size = batch_size
 
+        # next position to write and number of stored transitions
+        self.head = 0
         self.count = 0
-        self.buffer = deque()
 
-        random.seed(seed)
+        # transitions arrays, allocated on the first store (when the
+        # states and actions dimensions are known)
+        self.s = None
+        self.a = None
+        self.r = None
+        self.new_s = None
+        self.done = None
+
+        self.random = np.random.RandomState(seed)
+
+    ## allocate transitions and batch arrays
+    def allocate(self, state_dim, action_dim):
+        self.s = np.zeros((self.size, state_dim), np.float32)
+        self.a = np.zeros((self.size, action_dim), np.float32)
+        self.r = np.zeros(self.size, np.float32)
+        self.new_s = np.zeros((self.size, state_dim), np.float32)
+        self.done = np.zeros(self.size, bool)
+
+        # batch arrays are reused, so a batch is valid until the next one
+        self.s_batch = np.zeros((self.batch_size, state_dim), np.float32)
+        self.a_batch = np.zeros((self.batch_size, action_dim), np.float32)
+        self.r_batch = np.zeros(self.batch_size, np.float32)
+        self.new_s_batch = np.zeros((self.batch_size, state_dim), np.float32)
+        self.done_batch = np.zeros(self.batch_size, bool)
 
+    ## sample a minibatch of stored transitions, with replacement (unlike
+    ## random.sample, a transition may be drawn twice); the returned arrays
+    ## are reused, so callers keeping a batch past the next call copy it
     def get_batch(self):
-        batch = np.array(random.sample(self.buffer, \
-            min(self.count, self.batch_size)))
+        n = min(self.count, self.batch_size)
+        indices = self.random.randint(0, self.count, n)
 
-        s     = np.array([b[0] for b in batch])
-        a     = np.array([b[1] for b in batch])
-        r     = np.array([b[2] for b in batch])
-        t     = np.array([b[3] for b in batch])
-        new_s = np.array([b[4] for b in batch])
+        s = np.take(self.s, indices, axis=0, out=self.s_batch[:n])
+        a = np.take(self.a, indices, axis=0, out=self.a_batch[:n])
+        r = np.take(self.r, indices, out=self.r_batch[:n])
+        new_s = np.take(self.new_s, indices, axis=0, out=self.new_s_batch[:n])
+        done = np.take(self.done, indices, out=self.done_batch[:n])
 
-        return s, a, r, t, new_s
+        return s, a, r, new_s, done
 
     def store(self, s, a, r, new_s, done):
-        exp = (s, a, r, new_s, done)
+        if self.s is None:
+            self.allocate(np.size(s), np.size(a))
 
+        # copy into the ring, overwriting the oldest transition when full
+        i = self.head
+        self.s[i] = s
+        self.a[i] = a
+        self.r[i] = r
+        self.new_s[i] = new_s
+        self.done[i] = done
+
+        self.head = (i + 1) % self.size
         if self.count < self.size:
             self.count += 1
-        else:
-            self.buffer.popleft()
 
-        self.buffer.append(exp)
+    ## copy of the buffer contents, to be checkpointed (taken on the calling
+    ## thread, so training pauses while it copies the whole buffer, about
+    ## 15 ms per 100000 transitions of robbie)
+    def get_state(self):
+        if self.a is None:
+            return {}
+
+        state = {'dims': np.array([self.s_batch.shape[1], self.a_batch.shape[1]])}
+        for name in self.STATE:
+            state[name] = np.copy(getattr(self, name))
+        return state
+
+    ## restore contents returned by get_state
+    def set_state(self, state):
+        if 'dims' not in state:
+            return
+
+        self.allocate(*state['dims'])
+        for name in self.STATE:
+            value = state[name]
+            setattr(self, name, value if value.ndim else value.item())
+
+    ## bytes used by stored transitions
+    def memory_usage(self):
+        arrays = [self.s, self.a, self.r, self.new_s, self.done]
+        return sum(array.nbytes for array in arrays if array is not None)
 
     def clear(self):
-        self.buffer.clear()
+        self.head = 0
         self.count = 0
@@ -0,0 +1,25 @@
+##
+## soft target updates [1] built once as assign ops, so target networks are
+## blended in graph instead of copying every weight to numpy and back
+##
+## [1] https://arxiv.org/pdf/1509.02971.pdf
+##
+
+## build target <- tau*model + (1 - tau)*target, for a tau placeholder
+def target_update_op(model, target):
+    import tensorflow as tf
+
+    tau = tf.placeholder(tf.float32, [])
+    updates = [t.assign(tau*w + (1 - tau)*t)
+               for w, t in zip(model.weights, target.weights)]
+
+    return tau, tf.group(*updates)
+
+## tau giving the same blend when targets are updated every k steps
+def every_k_tau(tau, k):
+    return 1 - (1 - tau)**k
+
+## update target networks of several networks on a single session run
+def target_train(sess, networks, tau):
+    sess.run([network.target_update for network in networks],
+        feed_dict={network.target_tau: tau for network in networks})
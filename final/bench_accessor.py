@@ -0,0 +1,56 @@
+import timeit
+import vrep
+from simulator import Simulator
+
+# benchmark constants
+SIMULATOR_PORT = 25000
+ROBOT_NAME = "Robbie"
+CALLS = 10000
+REPEAT = 5
+
+## run function and return calls per second
+def calls_per_second(function):
+    seconds = min(timeit.repeat(function, number=CALLS, repeat=REPEAT))
+    return CALLS / seconds
+
+def bench_accessor():
+    # with no server running the calls fail locally, which still measures
+    # the python side of each call
+    sim = Simulator("127.0.0.1", SIMULATOR_PORT)
+    try:
+        sim.connect()
+        handle = sim.get_handle(ROBOT_NAME)
+    except Exception:
+        print('No V-REP server found, measuring local call overhead only.')
+        handle = 0
+        # setters skip their calls while disconnected, so give both paths
+        # a (not started) client to call the library with
+        sim.id = 0
+
+    accessor = sim.get_accessor(handle)
+    accessor.get_position(True)
+    accessor.get_orientation(True)
+    accessor.get_velocity(True)
+    accessor.get_joint_position(True)
+
+    opmode = vrep.simx_opmode_buffer
+    cases = [('position', lambda: vrep.simxGetObjectPosition(sim.id, handle, -1, opmode),
+                          lambda: accessor.get_position()),
+             ('orientation', lambda: vrep.simxGetObjectOrientation(sim.id, handle, -1, opmode),
+                             lambda: accessor.get_orientation()),
+             ('velocity', lambda: vrep.simxGetObjectVelocity(sim.id, handle, opmode),
+                          lambda: accessor.get_velocity()),
+             ('joint position', lambda: vrep.simxGetJointPosition(sim.id, handle, opmode),
+                                lambda: accessor.get_joint_position()),
+             ('set position', lambda: vrep.simxSetObjectPosition(sim.id, handle, -1, [0, 0, 0], vrep.simx_opmode_oneshot),
+                              lambda: accessor.set_position([0, 0, 0]))]
+
+    for name, function, bound in cases:
+        before = calls_per_second(function)
+        after = calls_per_second(bound)
+        print('\t%-16s %10.0f -> %10.0f calls/s (%.1fx)' % (name, before, after, after / before))
+
+    sim.disconnect()
+
+if __name__ == "__main__":
+    bench_accessor()
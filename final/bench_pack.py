@@ -0,0 +1,66 @@
+import struct
+import timeit
+import numpy as np
+import vrep
+
+# benchmark constants
+BUFFER_SIZE = 10000
+REPEAT = 20
+
+## previous implementations, one struct call per element
+def pack_floats_loop(float_list):
+    s = bytes()
+    for value in float_list:
+        s = s + struct.pack('<f', value)
+    return bytearray(s)
+
+def unpack_floats_loop(packed):
+    return [struct.unpack('<f', packed[4 * i:4 * (i + 1)])[0] for i in range(len(packed) // 4)]
+
+def pack_ints_loop(int_list):
+    s = bytes()
+    for value in int_list:
+        s = s + struct.pack('<i', value)
+    return bytearray(s)
+
+def unpack_ints_loop(packed):
+    return [struct.unpack('<i', packed[4 * i:4 * (i + 1)])[0] for i in range(len(packed) // 4)]
+
+## run function and return elements per second
+def throughput(function, arg):
+    seconds = min(timeit.repeat(lambda: function(arg), number=1, repeat=REPEAT))
+    return BUFFER_SIZE / seconds
+
+def bench_pack():
+    floats = np.random.rand(BUFFER_SIZE).astype(np.float32).tolist()
+    ints = np.random.randint(-2**31, 2**31 - 1, BUFFER_SIZE).tolist()
+    packed_floats = vrep.simxPackFloats(floats)
+    packed_ints = vrep.simxPackInts(ints)
+
+    # same results on both implementations
+    assert packed_floats == pack_floats_loop(floats)
+    assert packed_ints == pack_ints_loop(ints)
+    assert vrep.simxUnpackFloats(packed_floats) == unpack_floats_loop(packed_floats)
+    assert vrep.simxUnpackInts(packed_ints) == unpack_ints_loop(packed_ints)
+    assert vrep.simxUnpackFloats(packed_floats, asList=False).tolist() == unpack_floats_loop(packed_floats)
+    assert vrep.simxUnpackInts(packed_ints, asList=False).tolist() == unpack_ints_loop(packed_ints)
+
+    # unpacking to lists (the default) and to new arrays
+    unpack_floats_array = lambda packed: vrep.simxUnpackFloats(packed, asList=False)
+    unpack_ints_array = lambda packed: vrep.simxUnpackInts(packed, asList=False)
+
+    cases = [('simxPackFloats', pack_floats_loop, vrep.simxPackFloats, floats),
+             ('simxUnpackFloats', unpack_floats_loop, vrep.simxUnpackFloats, packed_floats),
+             ('  (array)', unpack_floats_loop, unpack_floats_array, packed_floats),
+             ('simxPackInts', pack_ints_loop, vrep.simxPackInts, ints),
+             ('simxUnpackInts', unpack_ints_loop, vrep.simxUnpackInts, packed_ints),
+             ('  (array)', unpack_ints_loop, unpack_ints_array, packed_ints)]
+
+    print('%d elements per buffer' % BUFFER_SIZE)
+    for name, loop, vectorized, arg in cases:
+        before = throughput(loop, arg)
+        after = throughput(vectorized, arg)
+        print('\t%-18s %12.0f -> %12.0f elements/s (%.0fx)' % (name, before, after, after / before))
+
+if __name__ == "__main__":
+    bench_pack()
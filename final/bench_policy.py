@@ -0,0 +1,43 @@
+import timeit
+import numpy as np
+import tensorflow as tf
+from keras import backend as K
+from ai_utils.actor import actor_network
+from ai_utils.numpy_actor import numpy_actor
+from robbie import Robbie
+
+# benchmark constants
+BATCH_SIZES = [1, 64]
+NUMBER = 1000
+REPEAT = 5
+
+## run function and return microseconds per call
+def latency(function):
+    seconds = min(timeit.repeat(function, number=NUMBER, repeat=REPEAT))
+    return 1e6 * seconds / NUMBER
+
+def bench_policy():
+    sess = tf.Session()
+    K.set_session(sess)
+
+    states_dim, actions_dim = Robbie.get_dimensions()
+    actor = actor_network(sess, states_dim, actions_dim)
+    policy = numpy_actor(actor.helper.get_weights())
+
+    print('actor forward pass latency')
+    for batch_size in BATCH_SIZES:
+        states = np.random.rand(batch_size, states_dim).astype(np.float32)
+
+        # same actions on both
+        assert np.allclose(actor.helper.predict(states), policy.predict(states), atol=1e-5)
+
+        before = latency(lambda: actor.helper.predict(states))
+        after = latency(lambda: policy.predict(states))
+        print('\tbatch %3d: keras %8.1f us, numpy %8.1f us (%.0fx)' %
+              (batch_size, before, after, before / after))
+
+    refresh = latency(lambda: policy.refresh(actor.helper.get_weights()))
+    print('\trefresh: %8.1f us' % refresh)
+
+if __name__ == "__main__":
+    bench_policy()
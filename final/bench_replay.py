@@ -0,0 +1,96 @@
+import random
+import timeit
+from collections import deque
+import numpy as np
+from ai_utils.replay_buffer import replay_buffer
+from ai_utils.compact_replay_buffer import compact_replay_buffer
+
+# benchmark constants
+STATES_DIM = 36
+ACTIONS_DIM = 8
+BATCH_SIZE = 32
+SIZES = [5000, 1000000]
+EPISODE_STEPS = 50
+NUMBER = 1000
+REPEAT = 5
+
+## previous implementation, a deque of tuples sampled with random.sample
+class deque_replay_buffer:
+    def __init__(self, batch_size, seed=1337, size=10000):
+        self.size = size
+        self.batch_size = batch_size
+        self.count = 0
+        self.buffer = deque()
+        random.seed(seed)
+
+    def get_batch(self):
+        # (object array, as older numpy built implicitly for ragged rows)
+        batch = np.array(random.sample(self.buffer, \
+            min(self.count, self.batch_size)), dtype=object)
+
+        s     = np.array([b[0] for b in batch])
+        a     = np.array([b[1] for b in batch])
+        r     = np.array([b[2] for b in batch])
+        t     = np.array([b[3] for b in batch])
+        new_s = np.array([b[4] for b in batch])
+
+        return s, a, r, t, new_s
+
+    def store(self, s, a, r, new_s, done):
+        exp = (np.copy(s), np.copy(a), r, np.copy(new_s), done)
+
+        if self.count < self.size:
+            self.count += 1
+        else:
+            self.buffer.popleft()
+
+        self.buffer.append(exp)
+
+## run function and return calls per second
+def throughput(function):
+    seconds = min(timeit.repeat(function, number=NUMBER, repeat=REPEAT))
+    return NUMBER / seconds
+
+def bench_replay():
+    s = np.random.rand(STATES_DIM).astype(np.float32)
+    a = np.random.rand(ACTIONS_DIM).astype(np.float32)
+
+    print('batch size %d' % BATCH_SIZE)
+    for size in SIZES:
+        for name, buffer_class in [('deque', deque_replay_buffer), ('ring', replay_buffer)]:
+            buff = buffer_class(BATCH_SIZE, size=size)
+            for _ in range(size):
+                buff.store(s, a, 0.5, s, False)
+
+            stores = throughput(lambda: buff.store(s, a, 0.5, s, False))
+            batches = throughput(buff.get_batch)
+            print('\t%-6s size %8d: %10.0f stores/s %10.0f batches/s' %
+                  (name, size, stores, batches))
+
+## memory used by each storage, on episodes of EPISODE_STEPS transitions
+def bench_memory():
+    size = SIZES[-1]
+    frames = size + size // EPISODE_STEPS + 2
+    buffers = [('ring float32', replay_buffer(BATCH_SIZE, size=size))]
+    for dtype in ['float32', 'float16', 'int16']:
+        buffers += [('compact ' + dtype, compact_replay_buffer(BATCH_SIZE,
+                     size=size, frames=frames, dtype=dtype))]
+
+    print('memory usage, size %d' % size)
+    s = np.random.rand(STATES_DIM).astype(np.float32)
+    a = np.random.rand(ACTIONS_DIM).astype(np.float32)
+    base = None
+    for name, buff in buffers:
+        for t in range(size + 1000):
+            new_s = np.random.rand(STATES_DIM).astype(np.float32)
+            done = t % EPISODE_STEPS == EPISODE_STEPS - 1
+            buff.store(s, a, 0.5, new_s, done)
+            s = np.random.rand(STATES_DIM).astype(np.float32) if done else new_s
+        usage = buff.memory_usage()
+        base = base or usage
+        print('\t%-16s %8.1f MB %6.1f bytes/transition (%.1fx), %d stored' %
+              (name, usage / 2.**20, float(usage) / size, float(base) / usage, buff.count))
+
+if __name__ == "__main__":
+    bench_replay()
+    bench_memory()
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+# benchmark constants
+REPEAT = 5
+
+# modules timed, each one imported on a fresh interpreter
+MODULES = ['numpy', 'ddpg', 'ai_utils.numpy_actor', 'tensorflow']
+
+# child process: import a module, print seconds taken, peak RSS (MB) and if
+# tensorflow was loaded
+CHILD = '''
+import resource, sys
+from time import time
+start_time = time()
+import %s
+seconds = time() - start_time
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+print('%%f %%f %%d' %% (seconds, rss, 'tensorflow' in sys.modules))
+'''
+
+## import module on a new interpreter, return seconds, peak RSS and if
+## tensorflow was loaded
+def bench_import(module):
+    output = subprocess.check_output([sys.executable, '-c', CHILD % module],
+                                     stderr=subprocess.STDOUT)
+    seconds, rss, tensorflow = output.split()
+    return float(seconds), float(rss), bool(int(tensorflow))
+
+def bench_startup():
+    print('import time (best of %d) and peak RSS' % REPEAT)
+    for module in MODULES:
+        try:
+            results = [bench_import(module) for _ in range(REPEAT)]
+        except subprocess.CalledProcessError:
+            print('\t%-22s unable to import' % module)
+            continue
+        seconds, rss, tensorflow = min(results)
+        print('\t%-22s %8.3f s %8.1f MB%s' % (module, seconds, rss,
+              ' (loads tensorflow)' if tensorflow else ''))
+
+if __name__ == "__main__":
+    bench_startup()
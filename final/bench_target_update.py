@@ -0,0 +1,63 @@
+import timeit
+import tensorflow as tf
+from keras import backend as K
+from ai_utils.actor import actor_network
+from ai_utils.critic import critic_network
+from ai_utils.target_update import every_k_tau, target_train
+from robbie import Robbie
+
+# benchmark constants
+TAU = .001
+TARGET_EVERY = 10
+NUMBER = 200
+REPEAT = 5
+
+## previous implementation, weights copied to numpy, blended and copied back
+def numpy_target_train(network, tau):
+    weights = network.helper.get_weights()
+    target_weights = network.target.get_weights()
+
+    for i in range(len(weights)):
+        target_weights[i] = tau*weights[i] + (1 - tau)*target_weights[i]
+
+    network.target.set_weights(target_weights)
+
+## run function and return calls per second
+def throughput(function):
+    seconds = min(timeit.repeat(function, number=NUMBER, repeat=REPEAT))
+    return NUMBER / seconds
+
+def bench_target_update():
+    sess = tf.Session()
+    K.set_session(sess)
+
+    states_dim, actions_dim = Robbie.get_dimensions()
+    actor = actor_network(sess, states_dim, actions_dim, tau=TAU)
+    critic = critic_network(sess, states_dim, actions_dim, tau=TAU)
+    networks = [actor, critic]
+
+    def numpy_update():
+        numpy_target_train(actor, TAU)
+        numpy_target_train(critic, TAU)
+
+    def graph_update():
+        target_train(sess, networks, TAU)
+
+    # one run of TARGET_EVERY training steps
+    tau_k = every_k_tau(TAU, TARGET_EVERY)
+    def graph_update_every_k():
+        target_train(sess, networks, tau_k)
+
+    before = throughput(numpy_update)
+    after = throughput(graph_update)
+    every_k = throughput(graph_update_every_k) * TARGET_EVERY
+
+    parameters = sum(K.count_params(w) for n in networks for w in n.helper.weights)
+    print('%d parameters (actor and critic)' % parameters)
+    print('\tnumpy blend        %10.1f updates/s' % before)
+    print('\tin graph           %10.1f updates/s (%.1fx)' % (after, after / before))
+    print('\tin graph, every %2d %10.1f updates/s (%.1fx)' %
+          (TARGET_EVERY, every_k, every_k / before))
+
+if __name__ == "__main__":
+    bench_target_update()
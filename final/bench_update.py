@@ -0,0 +1,89 @@
+import timeit
+import numpy as np
+import tensorflow as tf
+from ai_utils.actor import actor_network
+from ai_utils.critic import critic_network
+from ai_utils.replay_buffer import replay_buffer
+from ddpg import ddpg
+from robbie import Robbie
+
+# benchmark constants
+BUFFER_SIZE = 5000
+NUMBER = 100
+REPEAT = 5
+
+## run function and return calls per second
+def throughput(function):
+    seconds = min(timeit.repeat(function, number=NUMBER, repeat=REPEAT))
+    return NUMBER / seconds
+
+## replay buffer returning the same minibatch on every call
+class fixed_buffer:
+    def __init__(self, batch):
+        self.batch = batch
+
+    def get_batch(self):
+        return self.batch
+
+## check that fused updates give the same weights (and optimizers state) as
+## separate ones, starting from the same variables on a fixed minibatch
+def check_update(steps=3, tolerance=1e-5):
+    states_dim, actions_dim = Robbie.get_dimensions()
+
+    robbie_ai = ddpg(None, states_dim, actions_dim)
+    actor = actor_network(robbie_ai.sess, states_dim, actions_dim,
+        robbie_ai.batch_size, robbie_ai.tau, robbie_ai.lra)
+    critic = critic_network(robbie_ai.sess, states_dim, actions_dim,
+        robbie_ai.batch_size, robbie_ai.tau, robbie_ai.lrc)
+
+    n = robbie_ai.batch_size
+    buff = fixed_buffer((np.random.rand(n, states_dim), np.random.rand(n, actions_dim),
+        np.random.rand(n), np.random.rand(n, states_dim), np.zeros(n, bool)))
+
+    ## build the fused op before taking the snapshot, so every variable
+    ## exists on both runs
+    robbie_ai.fused_step(actor, critic, buff)
+
+    variables = tf.global_variables()
+    start = robbie_ai.sess.run(variables)
+
+    results = []
+    for step in [robbie_ai.separate_step, robbie_ai.fused_step]:
+        for variable, value in zip(variables, start):
+            variable.load(value, robbie_ai.sess)
+        losses = [step(actor, critic, buff) for _ in range(steps)]
+        results += [(losses, robbie_ai.sess.run(variables))]
+
+    (separate_losses, separate), (fused_losses, fused) = results
+    assert np.allclose(separate_losses, fused_losses, rtol=tolerance, atol=tolerance)
+    for variable, a, b in zip(variables, separate, fused):
+        assert np.allclose(a, b, rtol=tolerance, atol=tolerance), variable.name
+
+    print('fused and separate updates match on %d variables after %d steps' % (
+        len(variables), steps))
+
+def bench_update():
+    states_dim, actions_dim = Robbie.get_dimensions()
+
+    results = []
+    for fused in [False, True]:
+        robbie_ai = ddpg(None, states_dim, actions_dim, fused=fused)
+        actor = actor_network(robbie_ai.sess, states_dim, actions_dim,
+            robbie_ai.batch_size, robbie_ai.tau, robbie_ai.lra)
+        critic = critic_network(robbie_ai.sess, states_dim, actions_dim,
+            robbie_ai.batch_size, robbie_ai.tau, robbie_ai.lrc)
+
+        buff = replay_buffer(robbie_ai.batch_size, size=BUFFER_SIZE)
+        for _ in range(BUFFER_SIZE):
+            buff.store(np.random.rand(states_dim), np.random.rand(actions_dim),
+                np.random.rand(), np.random.rand(states_dim), False)
+
+        results += [throughput(lambda: robbie_ai.update(actor, critic, buff))]
+
+    print('batch size %d' % robbie_ai.batch_size)
+    print('\tseparate calls %8.1f updates/s' % results[0])
+    print('\tfused          %8.1f updates/s (%.1fx)' % (results[1], results[1] / results[0]))
+
+if __name__ == "__main__":
+    check_update()
+    bench_update()
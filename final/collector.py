@@ -0,0 +1,101 @@
+##
+## collector process of the actor-learner training: steps a robot with a
+## recent copy of the actor weights and sends its transitions to the learner
+##
+
+from time import time
+
+import numpy as np
+
+from ai_utils import noise
+from ai_utils.numpy_actor import numpy_actor
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# seconds between speed reports
+REPORT_INTERVAL = 10.
+
+def collect(index, make_robot, state_dim, action_dim, max_steps, transitions,
+    weights, stop, explore_decay=1.0/100000.):
+    ou = noise.ou()
+    robot = make_robot(index)
+
+    # act on a numpy copy of the actor, so collectors need no session; wait
+    # for the first weights published by the learner
+    actor = None
+    version = -1
+    while actor is None and not stop.is_set():
+        try:
+            version, actor_weights = weights.get(timeout=1.)
+            actor = numpy_actor(actor_weights)
+        except queue.Empty:
+            pass
+
+    epsilon = 1
+    steps = 0
+    last_steps = 0
+    last_report = time()
+
+    while not stop.is_set():
+        ## load the newest weights published by the learner
+        try:
+            while True:
+                version, actor_weights = weights.get_nowait()
+                actor.refresh(actor_weights)
+        except queue.Empty:
+            pass
+
+        robot.reset_robot()
+        s_t = np.reshape(robot.get_state(), (1, state_dim)).astype(np.float32)
+
+        s_batch = np.zeros((max_steps, state_dim), np.float32)
+        a_batch = np.zeros((max_steps, action_dim), np.float32)
+        r_batch = np.zeros(max_steps, np.float32)
+        new_s_batch = np.zeros((max_steps, state_dim), np.float32)
+        done_batch = np.zeros(max_steps, bool)
+
+        count = 0
+        for t in range(max_steps):
+            ## select action according to the current policy, with
+            ## exploration noise
+            a_t_raw = actor.predict(s_t)
+            epsilon = max(epsilon-explore_decay, 0)
+            a_t = a_t_raw + epsilon*ou.apply(a_t_raw)
+
+            new_s_t, r_t, done = robot.act(a_t[0])
+
+            s_batch[t] = s_t[0]
+            a_batch[t] = a_t[0]
+            r_batch[t] = r_t
+            new_s_batch[t] = np.reshape(new_s_t, (state_dim, ))
+            done_batch[t] = done
+
+            s_t = new_s_batch[t:t + 1]
+            count = t + 1
+
+            if done or stop.is_set():
+                break
+
+        ## send the episode transitions to the learner
+        steps += count
+        episode = (index, version, s_batch[:count], a_batch[:count],
+                   r_batch[:count], new_s_batch[:count], done_batch[:count])
+        while not stop.is_set():
+            try:
+                transitions.put(episode, timeout=1.)
+                break
+            except queue.Full:
+                pass
+
+        now = time()
+        if now - last_report >= REPORT_INTERVAL:
+            print('[collector %d] %.1f steps/s, weights version %d' %
+                  (index, (steps - last_steps) / (now - last_report), version))
+            last_steps = steps
+            last_report = now
+
+    # transitions the learner stopped reading are dropped at exit
+    transitions.cancel_join_thread()
@@ -4,17 +4,34 @@
 ###
 ### [1] https://arxiv.org/pdf/1509.02971.pdf
 
-from ai_utils import noise, replay_buffer as rb
-from ai_utils.actor import actor_network
-from ai_utils.critic import critic_network
+### tensorflow and keras are imported on the paths that build networks, so
+### importing this module stays cheap
+
+from ai_utils import noise, replay_buffer as rb, prioritized_replay_buffer as prb, \
+    memmap_replay_buffer as mrb, compact_replay_buffer as crb, prefetcher as pf
+from ai_utils.checkpoint import checkpoint_manager
+from ai_utils.metrics import metrics
+from ai_utils.numpy_actor import numpy_actor
+from ai_utils.target_update import every_k_tau, target_train
 
-from keras import backend as K
-import tensorflow as tf
 import numpy as np
+import multiprocessing as mp
 import sys
+from time import time
+
+from collector import collect
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 ## TODO: -> integrate with robot environment
 
+# timed stages (env is split in remote calls and python time of the robot)
+STAGES = ['inference', 'env', 'env_rpc', 'env_python', 'sample', 'critic',
+          'actor', 'target', 'fused']
+
 class ddpg:
     ##
     ## definition of our DDPG algorithm, default values are according to our
@@ -31,9 +48,32 @@ class ddpg:
     ##  -> lra:     learning rate for ACTOR
     ##  -> lrc:     learning rate for CRITIC
     ##
+    ##  -> prioritized: sample transitions by their TD errors;
+    ##  -> buffer_path: keep transitions on memory mapped files there, so
+    ##                  they are reused by the next training run;
+    ##  -> compact:     store each state once, as 'float32', 'float16' or
+    ##                  'int16' (see compact_replay_buffer);
+    ##  -> prefetch:    minibatches sampled ahead on a background thread;
+    ##  -> target_every: update target networks every k updates, with a tau
+    ##                   giving the same blend;
+    ##  -> fused:       run each whole update on a single session call;
+    ##  -> policy_every: updates between copies of the actor weights to the
+    ##                   numpy policy used to act (1 acts on the latest
+    ##                   weights, larger values act on weights up to that
+    ##                   many updates old);
+    ##  -> checkpoint_path: save the whole training state there, on the
+    ##                      background, and resume from the newest one;
+    ##  -> keep_checkpoints: checkpoints kept;
+    ##  -> metrics_path:    .jsonl or .csv file of per-episode metrics;
+    ##  -> print_interval:  minimum seconds between printed reports (None
+    ##                      never prints);
+    ##
     def __init__(self, robot, state_dim, action_dim,
         batch_size=64, wd=.01, gamma=.99, tau=.001, lra=.0001, lrc=.001,
-        path='./aidata/'):
+        path='./aidata/', prioritized=False, buffer_path=None, compact=None,
+        prefetch=0, target_every=1, fused=False, policy_every=1,
+        checkpoint_path=None, keep_checkpoints=3, metrics_path=None,
+        print_interval=0.):
 
         self.robot = robot
         self.path = path
@@ -44,30 +84,75 @@ class ddpg:
         self.wd = wd
         self.gamma = gamma
         self.tau = tau
+        self.target_every = target_every
+        self.updates = 0
+
+        # tau of target updates, to match target_every single updates
+        self.target_tau = every_k_tau(tau, target_every)
+
+        self.fused = fused
+        self.fused_op = None
+        self.q_stats = (0., 0.)
+
+        # numpy copy of the actor it was built from, to act without session
+        # calls (copied again after every policy_every updates)
+        self.policy = None
+        self.policy_actor = None
+        self.policy_updates = 0
+        self.policy_every = policy_every
 
         self.lra = lra
         self.lrc = lrc
 
+        self.prioritized = prioritized
+        self.buffer_path = buffer_path
+        self.compact = compact
+        self.prefetch = prefetch
+
+        # memmap and compact buffers keep no priorities, and store states
+        # differently from each other
+        if prioritized and (buffer_path is not None or compact is not None):
+            raise ValueError('Prioritized replay needs an in-memory buffer (no buffer_path or compact)!')
+        if buffer_path is not None and compact is not None:
+            raise ValueError('Memory mapped buffers can not be compact!')
+
+        self.checkpoint_path = checkpoint_path
+        self.keep_checkpoints = keep_checkpoints
+        self.checkpoints = None
+
+        # stage timers and metrics sink
+        self.metrics = metrics(metrics_path, STAGES, print_interval)
+
         self.action_dim = action_dim
         self.state_dim = state_dim
 
-        # gpu usage
-        # config = tf.ConfigProto()
-        # config.gpu_options.allow_growth = True
+        # vectorized environments (e.g. VecRobbie) step several robots at once
+        self.num_envs = getattr(robot, 'num_envs', 0)
 
-        self.sess = tf.Session() # config=config
-        K.set_session(self.sess)
+        # session, created on first use
+        self.session = None
 
-    def load_weights(self, actor, critic):
-        actor.load_weights(self.path)
-        critic.load_weights(self.path)
+    ## tensorflow session (importing tensorflow on the first call)
+    @property
+    def sess(self):
+        if self.session is None:
+            from keras import backend as K
+            import tensorflow as tf
 
-    ##########
-    ## act!
-    ##########
+            # gpu usage
+            # config = tf.ConfigProto()
+            # config.gpu_options.allow_growth = True
+
+            self.session = tf.Session() # config=config
+            K.set_session(self.session)
+
+        return self.session
+
+    ## build and load actor and critic networks to be trained
+    def build_networks(self):
+        from ai_utils.actor import actor_network
+        from ai_utils.critic import critic_network
 
-    ## train our ddpg model
-    def train(self, max_episodes, max_steps, buffer_size=5000):
         # initialize actor and critic networks
         actor = actor_network(self.sess, self.state_dim, self.action_dim,
             self.batch_size, self.tau, self.lra)
@@ -78,31 +163,124 @@ class ddpg:
         # load weights
         self.load_weights(actor, critic)
 
+        # build the fused op now, so any variable of it exists when a
+        # checkpoint is restored
+        if self.fused:
+            from ai_utils.fused_update import fused_update
+            self.fused_op = fused_update(self.sess, actor, critic, self.gamma)
+
+        return actor, critic
+
+    def make_buffer(self, buffer_size):
+        if self.buffer_path is not None:
+            buff = mrb.memmap_replay_buffer(self.batch_size, self.buffer_path,
+                size=buffer_size)
+        elif self.compact is not None:
+            buff = crb.compact_replay_buffer(self.batch_size, size=buffer_size,
+                dtype=self.compact, streams=max(self.num_envs, 1))
+        elif self.prioritized:
+            buff = prb.prioritized_replay_buffer(self.batch_size, size=buffer_size)
+        else:
+            buff = rb.replay_buffer(self.batch_size, size=buffer_size)
+
+        if self.prefetch:
+            return pf.prefetcher(buff, self.prefetch)
+        return buff
+
+    def load_weights(self, actor, critic):
+        actor.load_weights(self.path)
+        critic.load_weights(self.path)
+
+    ## save weights, along with the replay buffer when it is on disk, or
+    ## checkpoint the whole training state with its counters
+    def save(self, actor, critic, buff, counters):
+        if self.checkpoints is not None:
+            self.checkpoints.save(self.sess, counters, buff)
+            return
+
+        actor.save_weights(self.path)
+        critic.save_weights(self.path)
+        if self.buffer_path is not None:
+            buff.flush()
+
+    ## restore the newest checkpoint, if any, returning its counters
+    def restore(self, buff):
+        if self.checkpoint_path is None:
+            return {}
+
+        self.checkpoints = checkpoint_manager(self.checkpoint_path,
+            self.keep_checkpoints)
+        counters = self.checkpoints.restore(self.sess, buff)
+        if counters is None:
+            return {}
+
+        self.updates = counters['updates']
+        return counters
+
+    ## save final weights, wait for checkpoints and stop sampling ahead
+    def finish(self, actor, critic, buff):
+        actor.save_weights(self.path)
+        critic.save_weights(self.path)
+        if self.buffer_path is not None:
+            buff.flush()
+        if self.checkpoints is not None:
+            self.checkpoints.wait()
+        if self.prefetch:
+            buff.close()
+        self.metrics.close()
+
+    ##########
+    ## act!
+    ##########
+
+    ## train our ddpg model
+    ##
+    ##  -> utd_ratio:       gradient updates per robot step (may be fractional);
+    ##  -> warmup:          transitions stored before the first update (by
+    ##                      default, one batch);
+    ##  -> update_every:    run the updates owed every n robot steps, back to
+    ##                      back;
+    ##
+    def train(self, max_episodes, max_steps, buffer_size=5000, utd_ratio=1.,
+        warmup=None, update_every=1):
+        actor, critic = self.build_networks()
+
         # initialize replay buffer R
-        buff = rb.replay_buffer(self.batch_size, size=buffer_size)
+        buff = self.make_buffer(buffer_size)
+
+        # resume from the newest checkpoint
+        counters = self.restore(buff)
 
         # helpers at training
-        epsilon = 1
+        epsilon = counters.get('epsilon', 1)
         explore_decay = 1.0/100000.
 
         avg_loss = 0.
 
-        for episode in range(max_episodes):
+        # updates owed to robot steps
+        warmup = self.batch_size if warmup is None else warmup
+        update_credit = counters.get('update_credit', 0.)
+        steps = counters.get('steps', 0)
+
+        # episodes ended by a stuck robot, since the last printed report
+        stuck_episodes = 0
+
+        for episode in range(counters.get('episode', 0), max_episodes):
             ## initialize a random process for action exploration from our
             ## VREP environment
             self.robot.reset_robot()
 
-            ## get initial state from our VREP environment
-            s_t = self.robot.get_state()
+            ## get initial state from our VREP environment, one row per robot
+            s_t = self.bake(self.robot.get_state())
 
             total_reward = 0.
             avg_loss = 0.
+            updates = 0
+            start_time = time()
             for t in range(max_steps):
-                ## select action according to our current policy
-                a_t = np.zeros(self.action_dim)
-                noise_t = np.zeros(self.action_dim)
-
-                a_t_raw = actor.helper.predict(self.bake(s_t))
+                ## select action according to our current policy, for all
+                ## robots at once
+                a_t_raw = self.predict(actor, s_t)
 
                 # apply exploration noise
                 epsilon = max(epsilon-explore_decay, 0)
@@ -111,71 +289,287 @@ class ddpg:
                 a_t = a_t_raw + noise_t
 
                 ## execute action and observe our new reward+state
-                new_s_t, r_t, done = self.robot.act(a_t[0])
-
-                ## store transition at our buffer
-                buff.store(np.reshape(s_t, (self.state_dim, )),
-                           np.reshape(a_t, (self.action_dim, )),
-                           r_t,
-                           np.reshape(new_s_t, (self.state_dim, )),
-                           done)
-
-                if buff.count > self.batch_size:
-                    ## sample random minibatch of transitions from buffer
-                    s_batch, a_batch, r_batch, new_s_batch, _ = buff.get_batch()
-
-                    ## set y according to our choice
-                    target_q_batch = critic.target.predict([new_s_batch, \
-                        actor.target.predict(new_s_batch)])
-
-                    y_batch = np.reshape(r_batch, (self.batch_size, 1)) + \
-                            self.gamma*target_q_batch
-
-                    ## update critics by minimizing loss
-                    loss = critic.helper.train_on_batch([s_batch, a_batch],
-                        y_batch)
-
-                    ## update actor policy using the sampled policy gradient
-                    gradient_actions = actor.helper.predict(s_batch)
-                    gradients = critic.gradients(s_batch, gradient_actions)
+                new_s_t, r_t, done = self.step(a_t)
 
-                    actor.train(s_batch, gradients)
+                ## store transitions at our buffer
+                for i in range(len(a_t)):
+                    buff.store(s_t[i], a_t[i], r_t[i], new_s_t[i], done[i])
 
-                    ## update target networks
-                    actor.target_train()
-                    critic.target_train()
+                ## train after warm-up, as many updates as owed
+                steps += 1
+                if buff.count > max(warmup, self.batch_size):
+                    update_credit += utd_ratio
 
-                    ## update loss tracking
-                    avg_loss += loss
+                if steps % update_every == 0:
+                    while update_credit >= 1:
+                        ## update loss tracking
+                        avg_loss += self.update(actor, critic, buff)
+                        update_credit -= 1
+                        updates += 1
 
                 s_t = new_s_t
-                total_reward += r_t
+                total_reward += np.mean(r_t)
 
                 ## did we end our episode?
-                if done:
-                    print('Robot was stuck. Resetting scene.')
+                s_t, finished = self.end_step(s_t, done)
+                if finished:
+                    stuck_episodes += 1
                     break
 
-            if episode % 5 is 0:
-                actor.save_weights(self.path)
-                critic.save_weights(self.path)
+            elapsed = time() - start_time
 
+            if episode % 5 is 0:
+                self.save(actor, critic, buff, {'episode': episode + 1,
+                    'epsilon': epsilon, 'steps': steps,
+                    'update_credit': update_credit, 'updates': self.updates})
+
+            record = self.metrics.write({'episode': episode,
+                'reward': total_reward, 'loss': avg_loss/max(updates, 1),
+                'steps': t + 1, 'updates': updates,
+                'steps_per_s': (t + 1)/elapsed, 'updates_per_s': updates/elapsed,
+                'reset_time': getattr(self.robot, 'reset_time', 0),
+                'epsilon': epsilon, 'stuck': finished})
+            if not self.metrics.should_print():
+                continue
 
             print('*********************************************')
             print('EPISODE: ' + str(episode))
             print('\tTOTAL REWARD: ' + str(total_reward))
-            print('\tAVERAGE LOSS: ' + str(avg_loss/max_steps))
+            print('\tAVERAGE LOSS: ' + str(avg_loss/max(updates, 1)))
+            print('\tUPDATES: ' + str(updates))
+            print('\tSTEPS/S: ' + str(record['steps_per_s']))
+            print('\tUPDATES/S: ' + str(record['updates_per_s']))
+            print('\tRESET TIME: ' + str(getattr(self.robot, 'reset_time', 0)))
+            print('\tSTUCK EPISODES: ' + str(stuck_episodes))
+            if self.fused:
+                print('\tQ (MEAN, MAX): ' + str(self.q_stats))
+            if self.prefetch:
+                print('\tPREFETCH (BATCHES, STALLS, STALL TIME): ' + str(buff.get_stats()))
+            self.metrics.print_stages(record)
             print('*********************************************')
+            stuck_episodes = 0
             # print(str(episode) + ", " + str(total_reward) + ", " + str(avg_loss/max_steps), file=sys.stderr)
 
+        self.finish(actor, critic, buff)
+
+    ## train our ddpg model on a learner process, while collector processes
+    ## step their robots (make_robot(index) must be a module level function)
+    def train_distributed(self, make_robot, num_collectors, max_updates,
+        max_steps, buffer_size=5000, publish_interval=100, report_interval=10.):
+        actor, critic = self.build_networks()
+
+        # initialize replay buffer R
+        buff = self.make_buffer(buffer_size)
+
+        # resume from the newest checkpoint
+        counters = self.restore(buff)
+
+        # start collectors, each one with its own weights queue
+        context = mp.get_context('spawn')
+        transitions = context.Queue(maxsize=4*num_collectors)
+        stop = context.Event()
+        weights = [context.Queue(maxsize=1) for _ in range(num_collectors)]
+        collectors = [context.Process(target=collect, args=(i, make_robot,
+            self.state_dim, self.action_dim, max_steps, transitions, weights[i],
+            stop)) for i in range(num_collectors)]
+        for collector in collectors:
+            collector.start()
+
+        version = counters.get('version', 0)
+        self.publish_weights(actor, weights, version)
+
+        # updates of resumed runs count towards max_updates
+        updates = self.updates
+        steps = counters.get('steps', 0)
+        avg_loss = 0.
+        last_updates = updates
+        last_steps = 0
+        last_report = time()
+
+        while updates < max_updates:
+            ## store every transition received (wait for some when there
+            ## are not enough to train)
+            try:
+                timeout = 1. if buff.count <= self.batch_size else 0
+                while True:
+                    _, _, s, a, r, new_s, done = transitions.get(timeout=timeout)
+                    for i in range(len(r)):
+                        buff.store(s[i], a[i], r[i], new_s[i], done[i])
+                    steps += len(r)
+                    timeout = 0
+            except queue.Empty:
+                self.check_collectors(collectors, transitions, weights, stop)
+
+            if buff.count <= self.batch_size:
+                continue
+
+            avg_loss += self.update(actor, critic, buff)
+            updates += 1
+
+            ## publish new weights to collectors
+            if updates % publish_interval == 0:
+                version += 1
+                self.publish_weights(actor, weights, version)
+
+            if updates % (5*publish_interval) == 0:
+                self.save(actor, critic, buff, {'updates': self.updates,
+                    'steps': steps, 'version': version})
+
+            now = time()
+            if now - last_report >= report_interval:
+                elapsed = now - last_report
+                record = self.metrics.write({'updates': updates,
+                    'loss': avg_loss/(updates - last_updates), 'steps': steps,
+                    'steps_per_s': (steps - last_steps)/elapsed,
+                    'updates_per_s': (updates - last_updates)/elapsed,
+                    'version': version})
+
+                if self.metrics.should_print():
+                    print('*********************************************')
+                    print('UPDATES: ' + str(updates))
+                    print('\tSTEPS/S: ' + str(record['steps_per_s']))
+                    print('\tUPDATES/S: ' + str(record['updates_per_s']))
+                    print('\tAVERAGE LOSS: ' + str(record['loss']))
+                    if self.fused:
+                        print('\tQ (MEAN, MAX): ' + str(self.q_stats))
+                    if self.prefetch:
+                        print('\tPREFETCH (BATCHES, STALLS, STALL TIME): ' + str(buff.get_stats()))
+                    self.metrics.print_stages(record)
+                    print('*********************************************')
+                avg_loss = 0.
+                last_updates = updates
+                last_steps = steps
+                last_report = now
+
+        self.stop_collectors(collectors, transitions, weights, stop)
+
+        self.finish(actor, critic, buff)
+
+    ## stop every collector when one of them exited (they only exit once
+    ## stopped), instead of waiting for its transitions forever
+    def check_collectors(self, collectors, transitions, weights, stop):
+        for i, collector in enumerate(collectors):
+            if not collector.is_alive():
+                self.stop_collectors(collectors, transitions, weights, stop)
+                raise Exception('Collector %d exited with code %s!' % (i, collector.exitcode))
+
+    ## stop collectors, draining their transitions so they are not blocked
+    ## flushing them, and terminate the ones not exiting in time
+    def stop_collectors(self, collectors, transitions, weights, stop, timeout=10.):
+        stop.set()
+
+        # weights not read by collectors are dropped at exit
+        for queue_weights in weights:
+            queue_weights.cancel_join_thread()
+
+        deadline = time() + timeout
+        while any(c.is_alive() for c in collectors) and time() < deadline:
+            try:
+                while True:
+                    transitions.get(timeout=.1)
+            except queue.Empty:
+                pass
+
+        for i, collector in enumerate(collectors):
+            collector.join(timeout=max(deadline - time(), 0))
+            if collector.is_alive():
+                print('Collector %d did not stop, terminating it.' % i)
+                collector.terminate()
+                collector.join()
+
+    ## send actor weights to every collector, replacing older ones not yet read
+    def publish_weights(self, actor, weights, version):
+        actor_weights = actor.helper.get_weights()
+        for queue_weights in weights:
+            try:
+                queue_weights.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                queue_weights.put_nowait((version, actor_weights))
+            except queue.Full:
+                pass
+
+    ## one training step of actor and critic networks
+    def update(self, actor, critic, buff):
+        if self.fused:
+            return self.fused_step(actor, critic, buff)
+        return self.separate_step(actor, critic, buff)
+
+    ## update on separate session calls
+    def separate_step(self, actor, critic, buff):
+        ## sample random minibatch of transitions from buffer
+        with self.metrics.time('sample'):
+            s_batch, a_batch, r_batch, new_s_batch, _ = buff.get_batch()
+
+        with self.metrics.time('critic'):
+            ## set y according to our choice
+            target_q_batch = critic.target.predict([new_s_batch, \
+                actor.target.predict(new_s_batch)])
+
+            y_batch = np.reshape(r_batch, (self.batch_size, 1)) + \
+                    self.gamma*target_q_batch
+
+            ## update critics by minimizing loss (weighted by importance
+            ## sampling, and sending TD errors back, on prioritized replay)
+            if self.prioritized:
+                td_errors = y_batch - critic.helper.predict([s_batch, a_batch])
+                buff.update_priorities(td_errors)
+                loss = critic.train(s_batch, a_batch, y_batch, buff.last_weights)
+            else:
+                loss = critic.train(s_batch, a_batch, y_batch)
+
+        ## update actor policy using the sampled policy gradient
+        with self.metrics.time('actor'):
+            gradient_actions = actor.helper.predict(s_batch)
+            gradients = critic.gradients(s_batch, gradient_actions)
+
+            actor.train(s_batch, gradients)
+
+        ## update target networks, both on one session run
+        self.updates += 1
+        if self.updates % self.target_every == 0:
+            with self.metrics.time('target'):
+                target_train(self.sess, [actor, critic], self.target_tau)
+
+        return loss
+
+    ## same as update, on a single session call
+    def fused_step(self, actor, critic, buff):
+        if self.fused_op is None:
+            from ai_utils.fused_update import fused_update
+            self.fused_op = fused_update(self.sess, actor, critic, self.gamma)
+
+        with self.metrics.time('sample'):
+            s_batch, a_batch, r_batch, new_s_batch, _ = buff.get_batch()
+        weights = buff.last_weights if self.prioritized else None
+
+        self.updates += 1
+        tau = self.target_tau if self.updates % self.target_every == 0 else None
+
+        with self.metrics.time('fused'):
+            loss, q_mean, q_max, td_errors = self.fused_op.train(s_batch,
+                a_batch, r_batch, new_s_batch, weights, tau)
+        self.q_stats = (q_mean, q_max)
+
+        if self.prioritized:
+            buff.update_priorities(td_errors)
+
+        return loss
+
     ## run our ddpg model
     def run(self, max_episodes, max_steps):
-        # initialize actor and critic networks
-        actor = actor_network(self.sess, self.state_dim, self.action_dim)
-        critic = critic_network(self.sess, self.state_dim, self.action_dim)
+        from ai_utils.actor import actor_network
+
+        # initialize the actor network only, the critic is not needed to act
+        actor = actor_network(self.sess, self.state_dim, self.action_dim,
+            inference=True)
 
         # load weights
-        self.load_weights(actor, critic)
+        actor.load_weights(self.path)
+
+        # episodes ended by a stuck robot, since the last printed report
+        stuck_episodes = 0
 
         for episode in range(max_episodes):
             ## initialize a random process for action exploration from our
@@ -186,33 +580,87 @@ class ddpg:
             s_t = self.bake(self.robot.get_state())
 
             total_reward = 0.
+            start_time = time()
             for t in range(max_steps):
                 ## select action according to our current policy
-                a_t = actor.helper.predict(s_t)
+                a_t = self.predict(actor, s_t)
 
                 ## execute action and observe our new reward+state
-                new_s_t, r_t, done = self.robot.act(a_t[0])
+                new_s_t, r_t, done = self.step(a_t)
 
-                s_t = self.bake(new_s_t)
-                total_reward += r_t
+                s_t = new_s_t
+                total_reward += np.mean(r_t)
 
                 ## did we end our episode?
-                if done:
-                    print('Robot was stuck. Resetting scene.')
+                s_t, finished = self.end_step(s_t, done)
+                if finished:
+                    stuck_episodes += 1
                     break
 
+            ## write the episode record, which also starts timing again
+            record = self.metrics.write({'episode': episode,
+                'reward': total_reward, 'steps': t + 1,
+                'steps_per_s': (t + 1)/(time() - start_time), 'stuck': finished})
+            if not self.metrics.should_print():
+                continue
+
             print('*********************************************')
             print('\tEPISODE: ' + str(episode))
             print('\tTOTAL REWARD: ' + str(total_reward))
+            print('\tSTUCK EPISODES: ' + str(stuck_episodes))
+            self.metrics.print_stages(record)
             print('*********************************************')
+            stuck_episodes = 0
+
+        self.metrics.close()
 
     ##########
     ## helpers
     ##########
 
-    ## bake our input
+    ## actions of our current policy, one row per robot
+    def predict(self, actor, s_t):
+        if self.policy_actor is not actor:
+            self.policy = numpy_actor(actor.helper.get_weights(), len(s_t))
+            self.policy_actor = actor
+            self.policy_updates = self.updates
+        elif self.updates - self.policy_updates >= self.policy_every:
+            self.policy.refresh(actor.helper.get_weights())
+            self.policy_updates = self.updates
+
+        with self.metrics.time('inference'):
+            return self.policy.predict(s_t)
+
+    ## execute actions on the robot(s), with results stacked one row per robot
+    def step(self, actions):
+        with self.metrics.time('env'):
+            if self.num_envs:
+                result = self.robot.act(actions)
+            else:
+                new_s_t, r_t, done = self.robot.act(actions[0])
+                result = self.bake(new_s_t), np.array([r_t]), np.array([done])
+
+        # robot time on remote calls and on python
+        rpc_time = getattr(self.robot, 'rpc_time', 0)
+        self.metrics.add('env_rpc', rpc_time)
+        self.metrics.add('env_python', getattr(self.robot, 'act_time', 0) - rpc_time)
+
+        return result
+
+    ## reset finished robots of vectorized environments, returning the new
+    ## states and if the episode is over
+    def end_step(self, s_t, done):
+        if self.num_envs:
+            if np.any(done):
+                self.robot.reset_robot(np.flatnonzero(done))
+                s_t = self.bake(self.robot.get_state())
+            return s_t, False
+
+        return s_t, bool(done[0])
+
+    ## bake our input, one row per robot
     def bake(self, arr):
-        return np.reshape(arr, (1, len(arr))).astype(np.float32)
+        return np.reshape(np.asarray(arr, np.float32), (-1, self.state_dim))
 
 ## testing...
 class robot:
@@ -0,0 +1,29 @@
+import os
+import tensorflow as tf
+from keras import backend as K
+from ai_utils.actor import actor_network
+from ai_utils.numpy_actor import numpy_actor
+from robbie import Robbie
+
+# export constants
+WEIGHTS_PATH = './aidata/'
+POLICY_PATH = './aidata/actor.npz'
+POLICY_DTYPE = 'float16' # 'float32' or 'float16'
+
+## write trained actor weights as a single .npz file, run by run_policy.py
+def export_policy():
+    sess = tf.Session()
+    K.set_session(sess)
+
+    states_dim, actions_dim = Robbie.get_dimensions()
+    actor = actor_network(sess, states_dim, actions_dim)
+    actor.load_weights(WEIGHTS_PATH)
+
+    policy = numpy_actor(actor.helper.get_weights())
+    policy.save(POLICY_PATH, POLICY_DTYPE)
+
+    print('Policy exported to ' + POLICY_PATH + ' (' +
+          str(os.path.getsize(POLICY_PATH)) + ' bytes).')
+
+if __name__ == "__main__":
+    export_policy()
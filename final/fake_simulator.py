@@ -0,0 +1,241 @@
+##
+## local stand-in for the V-REP server, so robbie and the training code can be
+## exercised without a running simulator
+##
+
+import copy
+import random
+from contextlib import contextmanager
+
+from simulator import ERROR, GROUP_REL_POSE, GROUP_JOINT_STATE
+
+# scene objects (must match robbie.py)
+ROBOT_NAME = "Robbie"
+TAIL_JOINT = "tailJoint"
+LEG_JOINTS = ["robbieLegJoint1", "robbieLegJoint2", "robbieLegJoint3"]
+FOOT_TIP = "robbieFootTip"
+FOOT_TARGET = "robbieFootTarget"
+LEG_JOINT_SUFFIX = ["", "#0", "#1", "#2"]
+
+# remote API script functions (see remote_api.lua)
+RESET_FUNC = 'resetSimulation'
+STEP_FUNC = 'stepRobbie'
+LIMITS_FUNC = 'setRobbieLimits'
+SAVE_FUNC = 'saveRobbie'
+RESTORE_FUNC = 'restoreRobbie'
+
+# toy scene values
+MAX_SPEED = 0.5 # max speed of feet
+INIT_HEIGHT = 0.1 # initial robot height
+FEET_OFFSETS = [[-5e-2, 5e-2], [5e-2, 5e-2], [-5e-2, -5e-2], [5e-2, -5e-2]]
+TARGET_HEIGHT = -5e-2 # initial feet targets height relative to the body
+PUSH_GAIN = 0.5 # body displacement for each feet target displacement
+NOISE = 1e-4 # noise on body motion
+
+class FakeSimulator(object):
+    def __init__(self, ip, port, seed=None):
+        self.id = ERROR
+        self.ip = ip
+        self.port = port
+        self.random = random.Random(seed)
+
+        # scene object handles
+        self.handles = {}
+        names = [ROBOT_NAME, TAIL_JOINT]
+        for suffix in LEG_JOINT_SUFFIX:
+            names += [FOOT_TIP + suffix, FOOT_TARGET + suffix]
+            names += [joint + suffix for joint in LEG_JOINTS]
+        for i, name in enumerate(names):
+            self.handles[name] = i + 1
+
+        self.robot = self.handles[ROBOT_NAME]
+        self.tips = [self.handles[FOOT_TIP + s] for s in LEG_JOINT_SUFFIX]
+        self.targets = [self.handles[FOOT_TARGET + s] for s in LEG_JOINT_SUFFIX]
+        self.joints = [self.handles[joint + s] for s in LEG_JOINT_SUFFIX for joint in LEG_JOINTS]
+        self.joints += [self.handles[TAIL_JOINT]]
+
+        self.limits = None
+        self.reset_scene()
+
+    ## put every object back on its initial pose
+    def reset_scene(self):
+        self.pose = [0, 0, INIT_HEIGHT, 0, 0, 0]
+        self.rel_positions = {}
+        for target, offset in zip(self.targets, FEET_OFFSETS):
+            self.rel_positions[target] = [offset[0], offset[1], TARGET_HEIGHT]
+        self.last_rel_positions = copy.deepcopy(self.rel_positions)
+
+    def connect(self):
+        self.id = self.port
+        return self.id
+
+    def disconnect(self):
+        self.id = ERROR
+
+    # no remote API, so nothing is profiled
+    def get_profile(self):
+        return None
+
+    def dump_profile(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    @contextmanager
+    def batch(self):
+        yield self
+
+    ## advance one step: feet pushing back move the body forward
+    def update(self):
+        push = 0
+        for target in self.targets:
+            push += self.last_rel_positions[target][1] - self.rel_positions[target][1]
+        self.pose[1] += PUSH_GAIN * push / len(self.targets) + self.random.gauss(0, NOISE)
+        self.pose[0] += self.random.gauss(0, NOISE)
+        self.pose[5] += self.random.gauss(0, NOISE)
+        self.last_rel_positions = copy.deepcopy(self.rel_positions)
+
+    def execute_script(self, object_name, function_name):
+        if function_name == RESET_FUNC:
+            self.reset_scene()
+
+    def call_script(self, object_name, function_name, floats):
+        if function_name == LIMITS_FUNC:
+            self.limits = floats[:12], floats[12:24]
+            return []
+        if function_name == STEP_FUNC:
+            return self.step_robbie(floats)
+        if function_name == SAVE_FUNC:
+            self.saved = copy.deepcopy((self.pose, self.rel_positions))
+            return []
+        if function_name == RESTORE_FUNC:
+            self.pose, self.rel_positions = copy.deepcopy(self.saved)
+            self.last_rel_positions = copy.deepcopy(self.rel_positions)
+            return []
+        raise Exception('Unable to call script function!')
+
+    def step_packed(self, object_name, function_name, floats):
+        data = self.call_script(object_name, function_name, floats)
+        self.update()
+
+        return data
+
+    ## same as stepRobbie in remote_api.lua
+    def step_robbie(self, floats):
+        tick_move = MAX_SPEED * floats[8]
+        for i, target in enumerate(self.targets):
+            position = self.rel_positions[target]
+            position[1] += floats[2 * i] * tick_move
+            position[2] += floats[2 * i + 1] * tick_move
+            if self.limits is not None:
+                min_limits, max_limits = self.limits
+                for j in range(3):
+                    index = i * 3 + j
+                    position[j] = max(min(position[j], max_limits[index]), min_limits[index])
+
+        state = self.get_position(self.robot) + self.get_orientation(self.robot)
+        for tip in self.tips:
+            state += self.get_position(tip)
+        for target in self.targets:
+            state += self.get_position(target, relative=True)
+        for joint in self.joints:
+            state += [self.get_joint_position(joint)]
+
+        return state
+
+    def get_handle(self, name):
+        if name not in self.handles:
+            raise Exception('Unable to receive handle!')
+
+        return self.handles[name]
+
+    def get_position(self, handle, first_call=False, relative=False):
+        if handle in self.targets and relative:
+            return list(self.rel_positions[handle])
+        if handle in self.tips:
+            target = self.targets[self.tips.index(handle)]
+            return [a + b for a, b in zip(self.pose[:3], self.rel_positions[target])]
+        if handle in self.targets:
+            return [a + b for a, b in zip(self.pose[:3], self.rel_positions[handle])]
+        return self.pose[:3]
+
+    def get_orientation(self, handle, first_call=False, relative=False):
+        return self.pose[3:6] if handle == self.robot else [0, 0, 0]
+
+    def get_joint_position(self, handle, first_call=False):
+        if handle not in self.joints[:-1]:
+            return 0
+        # each leg bends with the height of its feet target
+        index = self.joints.index(handle)
+        target = self.targets[index // len(LEG_JOINTS)]
+        return (self.rel_positions[target][2] - TARGET_HEIGHT) * (index % len(LEG_JOINTS) + 1)
+
+    def get_group_state(self, handles, data_type, first_call=False):
+        if data_type == GROUP_JOINT_STATE:
+            return [[self.get_joint_position(h), 0] for h in handles]
+        relative = data_type == GROUP_REL_POSE
+        return [self.get_position(h, relative=relative) + self.get_orientation(h, relative=relative)
+                for h in handles]
+
+    def set_position(self, handle, pos, relative=False):
+        if handle in self.targets and relative:
+            self.rel_positions[handle] = list(pos)
+
+## check that both ways of stepping robbie give the same states and episode
+## ends (robbie's clock ticks at a fixed rate, so both see the same tick
+## times). stepRobbie replies before the step is triggered, so the packed
+## body pose is the unpacked one of the step before
+def check_packed_step(steps=20, tick=0.05):
+    import numpy as np
+    import robbie as robbie_module
+
+    clock = [0.]
+    def fixed_time():
+        clock[0] += tick
+        return clock[0]
+
+    real_time = robbie_module.time
+    robbie_module.time = fixed_time
+    try:
+        actions = np.random.RandomState(1337).uniform(-1, 1, (steps, 8))
+        results = []
+        for packed in [False, True]:
+            clock[0] = 0.
+            sim = FakeSimulator("127.0.0.1", 25000, seed=1337)
+            sim.connect()
+
+            robbie = robbie_module.Robbie(sim, ROBOT_NAME, packed=packed, fast_reset=True)
+            robbie.reset_robot()
+            states = [np.copy(robbie.get_state()[0])]
+            poses = []
+            dones = []
+            for action in actions:
+                state, _, done = robbie.act(action)
+                states += [np.copy(state[0])]
+                poses += [np.concatenate((robbie.position, robbie.orientation))]
+                dones += [done]
+            results += [(np.array(states), np.array(poses), dones)]
+    finally:
+        robbie_module.time = real_time
+
+    (unpacked_states, unpacked_poses, unpacked_dones), \
+        (packed_states, packed_poses, packed_dones) = results
+
+    # feet offsets and speeds, and joints (all but the orientation)
+    assert np.allclose(unpacked_states[:, :33], packed_states[:, :33], atol=1e-5), \
+        'Packed feet and joints states differ!'
+    assert np.allclose(unpacked_poses[:-1], packed_poses[1:], atol=1e-5), \
+        'Packed body pose is not the one of the step before!'
+    assert unpacked_dones == packed_dones, 'Episode ends differ!'
+
+    # the feet did move, so the comparison is not between idle robots
+    assert not np.allclose(unpacked_states[0], unpacked_states[-1]), 'Robot did not move!'
+
+## testing...
+if __name__ == "__main__":
+    check_packed_step()
+    print('Packed and unpacked steps match.')
@@ -0,0 +1,153 @@
+##
+## profiler of remote API commands: the vrep C functions are wrapped only while
+## a profiled simulator is connected, keeping per-command counts, latency
+## histograms and error/novalue counts of that simulator's client
+##
+
+import threading
+from bisect import bisect_left
+from time import time
+
+import vrep
+
+# upper bounds (milliseconds) of latency histogram buckets, last one unbounded
+BUCKETS = [0.05, 0.1, 0.2, 0.5, 1., 2., 5., 10., 20., 50., 100., 200., 500., 1000., float('inf')]
+
+# C functions which are not commands of a client, or are only queried by
+# reports (message info is read locally, ping is sent by the report itself)
+NOT_COMMANDS = ['c_Start', 'c_Finish', 'c_CreateBuffer', 'c_ReleaseBuffer',
+                'c_GetConnectionId', 'c_GetPingTime', 'c_GetLastCmdTime',
+                'c_GetInMessageInfo', 'c_GetOutMessageInfo']
+
+# message header values reported (see simxGetInMessageInfo/simxGetOutMessageInfo)
+IN_MESSAGE_INFO = {'message_id': vrep.simx_headeroffset_message_id,
+                   'client_time': vrep.simx_headeroffset_client_time,
+                   'server_time': vrep.simx_headeroffset_server_time,
+                   'scene_id': vrep.simx_headeroffset_scene_id,
+                   'server_state': vrep.simx_headeroffset_server_state}
+OUT_MESSAGE_INFO = {'message_id': vrep.simx_headeroffset_message_id,
+                    'client_time': vrep.simx_headeroffset_client_time}
+
+# profiles of connected clients and original functions of wrapped ones
+profiles = {}
+originals = {}
+lock = threading.Lock()
+
+class Profile(object):
+    def __init__(self):
+        self.commands = {}
+        self.start_time = time()
+
+    def reset(self):
+        self.commands = {}
+        self.start_time = time()
+
+    ## count a command, its latency and returned status
+    def record(self, command, seconds, status):
+        stats = self.commands.get(command)
+        if stats is None:
+            stats = self.commands[command] = {'count': 0, 'errors': 0, 'novalue': 0,
+                                              'total': 0., 'max': 0.,
+                                              'histogram': [0] * len(BUCKETS)}
+
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        stats['histogram'][bisect_left(BUCKETS, seconds * 1e3)] += 1
+
+        # replies of streaming reads (and non-blocking commands) not received yet
+        if status & vrep.simx_return_novalue_flag:
+            stats['novalue'] += 1
+        if status & ~vrep.simx_return_novalue_flag:
+            stats['errors'] += 1
+
+    ## statistics of every command, slowest (by total time) first, in milliseconds
+    def report(self):
+        report = []
+        for command, stats in self.commands.items():
+            report += [{'command': command, 'count': stats['count'],
+                        'errors': stats['errors'], 'novalue': stats['novalue'],
+                        'total_ms': stats['total'] * 1e3,
+                        'mean_ms': stats['total'] * 1e3 / stats['count'],
+                        'p50_ms': self.percentile(stats, 50),
+                        'p99_ms': self.percentile(stats, 99),
+                        'max_ms': stats['max'] * 1e3,
+                        'histogram': list(stats['histogram'])}]
+
+        return sorted(report, key=lambda row: -row['total_ms'])
+
+    ## upper bound of the histogram bucket of a percentile
+    def percentile(self, stats, q):
+        seen = 0
+        for bound, count in zip(BUCKETS, stats['histogram']):
+            seen += count
+            if seen * 100. >= q * stats['count']:
+                return min(bound, stats['max'] * 1e3)
+
+        return stats['max'] * 1e3
+
+## wrap a C function, so calls of profiled clients are recorded under the
+## name of its simx function
+def wrap(name, function):
+    command = 'simx' + name[2:]
+
+    def profiled(client_id, *args):
+        client_profile = profiles.get(client_id)
+        if client_profile is None:
+            return function(client_id, *args)
+
+        start_time = time()
+        status = function(client_id, *args)
+        client_profile.record(command, time() - start_time, status)
+        return status
+
+    return profiled
+
+def install():
+    for name in dir(vrep):
+        if name.startswith('c_') and name not in NOT_COMMANDS:
+            originals[name] = getattr(vrep, name)
+            setattr(vrep, name, wrap(name, originals[name]))
+
+def uninstall():
+    for name, function in originals.items():
+        setattr(vrep, name, function)
+    originals.clear()
+
+## profile commands of a client, wrapping functions for the first one
+def register(client_id, client_profile):
+    with lock:
+        if not profiles:
+            install()
+        profiles[client_id] = client_profile
+
+## stop profiling a client, restoring functions after the last one
+def unregister(client_id):
+    with lock:
+        profiles.pop(client_id, None)
+        if not profiles and originals:
+            uninstall()
+
+## connection values of a client: ping, simulation time of the last command
+## and header values of the last messages
+def client_info(client_id):
+    status, ping = vrep.simxGetPingTime(client_id)
+    info = {'ping_ms': ping if status == vrep.simx_return_ok else None,
+            'last_cmd_time_ms': vrep.simxGetLastCmdTime(client_id)}
+
+    for prefix, get_info, fields in [('in_', vrep.simxGetInMessageInfo, IN_MESSAGE_INFO),
+                                     ('out_', vrep.simxGetOutMessageInfo, OUT_MESSAGE_INFO)]:
+        for field, offset in sorted(fields.items()):
+            status, value = get_info(client_id, offset)
+            info[prefix + field] = value if status != -1 else None
+
+    return info
+
+def print_report(report):
+    print('REMOTE API PROFILE (%.1f s)' % report['seconds'])
+    print('\tPING: %s ms  LAST COMMAND: %d ms  SCENE: %s' % (report['ping_ms'],
+          report['last_cmd_time_ms'], report['in_scene_id']))
+    for row in report['commands']:
+        print('\t%-32s %7d calls  p50 %8.3f ms  p99 %8.3f ms  total %9.1f ms  errors %d  novalue %d' % (
+              row['command'], row['count'], row['p50_ms'], row['p99_ms'],
+              row['total_ms'], row['errors'], row['novalue']))
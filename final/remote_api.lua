@@ -0,0 +1,112 @@
+-- Functions called by robbie.py through simxCallScriptFunction.
+--
+-- Append them to the customization script of the 'RemoteAPI' object of the
+-- robbie scene (the same script that provides 'resetSimulation').
+
+-- robot constants (must match robbie.py)
+ROBOT_NAME = 'Robbie'
+TAIL_JOINT = 'tailJoint'
+LEG_JOINTS = {'robbieLegJoint1', 'robbieLegJoint2', 'robbieLegJoint3'}
+FOOT_TIP = 'robbieFootTip'
+FOOT_TARGET = 'robbieFootTarget'
+LEG_JOINT_SUFFIX = {'', '#0', '#1', '#2'}
+MAX_SPEED = 0.5
+
+-- get every handle once
+getRobbieHandles = function()
+    if robbie then
+        return
+    end
+
+    robbie = simGetObjectHandle(ROBOT_NAME)
+    footTips = {}
+    footTargets = {}
+    robotJoints = {}
+
+    for i = 1, #LEG_JOINT_SUFFIX do
+        local suffix = LEG_JOINT_SUFFIX[i]
+        footTips[i] = simGetObjectHandle(FOOT_TIP .. suffix)
+        footTargets[i] = simGetObjectHandle(FOOT_TARGET .. suffix)
+        for j = 1, #LEG_JOINTS do
+            robotJoints[#robotJoints + 1] = simGetObjectHandle(LEG_JOINTS[j] .. suffix)
+        end
+    end
+    robotJoints[#robotJoints + 1] = simGetObjectHandle(TAIL_JOINT)
+end
+
+-- append values of a table to another
+appendValues = function(to, from)
+    for i = 1, #from do
+        to[#to + 1] = from[i]
+    end
+end
+
+-- store min and max relative position of each foot target
+-- inFloats: 4 * 3 min positions followed by 4 * 3 max positions
+setRobbieLimits = function(inInts, inFloats, inStrings, inBuffer)
+    minPositions = {}
+    maxPositions = {}
+    for i = 1, 12 do
+        minPositions[i] = inFloats[i]
+        maxPositions[i] = inFloats[12 + i]
+    end
+    return {}, {}, {}, ''
+end
+
+-- move feet targets and reply with the packed robot state
+-- inFloats: 8 feet speeds (2 axis per foot) followed by the tick time
+-- outFloats: position (3), orientation (3), tips absolute position (4 * 3),
+--            targets relative position (4 * 3) and joints position (13)
+stepRobbie = function(inInts, inFloats, inStrings, inBuffer)
+    getRobbieHandles()
+
+    -- move feet targets, clamped to their limits
+    local tickMove = MAX_SPEED * inFloats[9]
+    for i = 1, #footTargets do
+        local position = simGetObjectPosition(footTargets[i], sim_handle_parent)
+        position[2] = position[2] + inFloats[2 * i - 1] * tickMove
+        position[3] = position[3] + inFloats[2 * i] * tickMove
+        if minPositions then
+            for j = 1, 3 do
+                local index = (i - 1) * 3 + j
+                position[j] = math.max(math.min(position[j], maxPositions[index]), minPositions[index])
+            end
+        end
+        simSetObjectPosition(footTargets[i], sim_handle_parent, position)
+    end
+
+    -- pack robot state
+    local state = {}
+    appendValues(state, simGetObjectPosition(robbie, -1))
+    appendValues(state, simGetObjectOrientation(robbie, -1))
+    for i = 1, #footTips do
+        appendValues(state, simGetObjectPosition(footTips[i], -1))
+    end
+    for i = 1, #footTargets do
+        appendValues(state, simGetObjectPosition(footTargets[i], sim_handle_parent))
+    end
+    for i = 1, #robotJoints do
+        state[#state + 1] = simGetJointPosition(robotJoints[i])
+    end
+
+    return {}, state, {}, ''
+end
+
+-- save robot configuration, to be restored by restoreRobbie
+saveRobbie = function(inInts, inFloats, inStrings, inBuffer)
+    getRobbieHandles()
+    robbieConfiguration = simGetConfigurationTree(robbie)
+    return {}, {}, {}, ''
+end
+
+-- put robot back on the saved configuration without restarting the
+-- simulation, so the remote API client and its streams stay alive
+restoreRobbie = function(inInts, inFloats, inStrings, inBuffer)
+    getRobbieHandles()
+    if not robbieConfiguration then
+        error('Robbie configuration was not saved')
+    end
+    simSetConfigurationTree(robbieConfiguration)
+    simResetDynamicObject(robbie + sim_handleflag_model)
+    return {}, {}, {}, ''
+end
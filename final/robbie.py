@@ -1,10 +1,15 @@
-import copy
 import math
+import numpy as np
 from time import time
+from simulator import GROUP_ABS_POSE, GROUP_REL_POSE, GROUP_JOINT_STATE
 
 # remote API script
 REMOTE_API_OBJ = 'RemoteAPI'
 REMOTE_API_FUNC = 'resetSimulation'
+REMOTE_API_STEP = 'stepRobbie'
+REMOTE_API_LIMITS = 'setRobbieLimits'
+REMOTE_API_SAVE = 'saveRobbie'
+REMOTE_API_RESTORE = 'restoreRobbie'
 
 # robot constants
 STUCK_MARGIN = 1e-2
@@ -32,6 +37,7 @@ STOP_PENALTY = -10 # penalty for not moving
 # state and action contants
 STATES_DIM = 36
 ACTIONS_DIM = 8
+PACKED_DIM = 43 # pose, tips, targets and joints replied by the step script
 
 # action values
 MAX_SPEED = 0.5 # max speed of feet
@@ -39,12 +45,20 @@ FRONT_MIN_LIMITS = [0, -2e-2, -1e-2] # min relative position of front feet
 FRONT_MAX_LIMITS = [0, 2e-2, 2e-2] # max relative position of front feet
 BACK_MIN_LIMITS = [0, -2e-2, -1e-2] # min relative position of back feet
 BACK_MAX_LIMITS = [0, 2e-2, 2e-2] # max relative position of back feet
+MIN_LIMITS = np.array([FRONT_MIN_LIMITS, BACK_MIN_LIMITS] * 2, np.float32) # min limits of each foot
+MAX_LIMITS = np.array([FRONT_MAX_LIMITS, BACK_MAX_LIMITS] * 2, np.float32) # max limits of each foot
 
 class Robbie(object):
-    def __init__(self, sim, name):
+    def __init__(self, sim, name, packed=False, fast_reset=False):
         self.sim = sim                          # simulation environment
         self.name = name                        # robot's name
         self.handle = self.sim.get_handle(name) # robot's id handle
+        self.packed = packed                    # step through a single script call
+        self.fast_reset = fast_reset            # reset without reconnecting
+        self.reset_time = 0                     # last reset latency
+        self.act_time = 0                       # last act latency
+        self.rpc_time = 0                       # last act time on remote calls
+        self.pose_saved = False                 # pose saved for fast reset
 
         # last tick time
         self.last_tick = time()
@@ -66,58 +80,102 @@ class Robbie(object):
         self.robot_joints += [self.sim.get_handle(TAIL_JOINT)]
 
         # declare pose, position and speed variables
-        self.position = [0] * 3
-        self.orientation = [0] * 3
-        self.tips_position = [0] * len(self.foot_tips)
-        self.tips_speed = [0] * (2 * len(self.foot_tips))
-        self.joints_position = [0] * len(self.foot_targets)
+        feet = len(self.foot_tips)
+        self.position = np.zeros(3, np.float32)
+        self.orientation = np.zeros(3, np.float32)
+        self.tips_position = np.zeros((feet, 3), np.float32)
+        self.tips_speed = np.zeros(2 * feet, np.float32)
+        self.joints_position = np.zeros(len(self.robot_joints), np.float32)
 
         # relative positions
-        self.tips_rel_position = [0] * len(self.foot_tips)
-        self.init_rel_position = [0] * len(self.tips_rel_position)
-        self.max_positions = [0] * len(self.tips_rel_position)
-        self.min_positions = [0] * len(self.tips_rel_position)
+        self.tips_rel_position = np.zeros((feet, 3), np.float32)
+        self.init_rel_position = np.zeros((feet, 3), np.float32)
+        self.max_positions = np.zeros((feet, 3), np.float32)
+        self.min_positions = np.zeros((feet, 3), np.float32)
+        self.new_rel_position = np.zeros((feet, 3), np.float32)
 
         # last frame variables
-        self.last_position = [0] * 3
-        self.last_orientation = [0] * 3
-        self.last_speed = [0] * len(self.tips_speed)
+        self.last_position = np.zeros(3, np.float32)
+        self.last_orientation = np.zeros(3, np.float32)
+        self.last_speed = np.zeros(len(self.tips_speed), np.float32)
 
         # stuck and fallen check variables
         self.is_stuck = False
         self.has_stopped = False
-        self.stuck_position = [0] * 3
+        self.stuck_position = np.zeros(3, np.float32)
         self.stuck_time = 0
         self.has_fallen = False
 
+        # state buffers, alternated so the last two states stay valid
+        self.states = np.zeros((2, 1, STATES_DIM), np.float32)
+        self.state_index = 0
+        self.tips_offset = np.zeros((feet, 3), np.float32)
+        self.step_input = np.zeros(2 * feet + 1, np.float32)
+
         # initial update
         self.pre_update()
 
     ## reset robot on the scene
     def reset_robot(self):
-        # reset server through script
-        self.sim.execute_script(REMOTE_API_OBJ, REMOTE_API_FUNC)
-        self.sim.disconnect()
-        self.sim.connect()
+        # remote API profile of the last episode, when profiling
+        self.sim.dump_profile()
+
+        start_time = time()
 
         # reset variables
-        self.last_speed = [0] * len(self.tips_speed)
+        self.last_speed[:] = 0
         self.is_stuck = False
         self.has_stopped = False
-        self.stuck_position = [0] * 3
+        self.stuck_position[:] = 0
         self.stuck_time = 0
 
-        # initial update
-        self.pre_update()
+        if not (self.fast_reset and self.pose_saved and self.restore_robot()):
+            # reset server through script
+            self.sim.execute_script(REMOTE_API_OBJ, REMOTE_API_FUNC)
+            self.sim.disconnect()
+            self.sim.connect()
+
+            # initial update
+            self.pre_update()
+
+            # save pose to be restored by the next fast reset
+            if self.fast_reset:
+                self.save_robot()
+
+        self.last_tick = time()
+        self.reset_time = self.last_tick - start_time
+
+    ## restore robot pose saved on the server, keeping connection and streams
+    def restore_robot(self):
+        try:
+            self.sim.call_script(REMOTE_API_OBJ, REMOTE_API_RESTORE, [])
+        except Exception:
+            print('Unable to restore robot pose, resetting simulation instead.')
+            self.fast_reset = False
+            return False
+
+        # feet limits of the first reset still apply
+        self.sim.update()
+        self.update_state(False)
+        self.sim.update()
+        self.update_state(False)
+        return True
+
+    ## save robot pose on the server
+    def save_robot(self):
+        try:
+            self.sim.call_script(REMOTE_API_OBJ, REMOTE_API_SAVE, [])
+            self.pose_saved = True
+        except Exception:
+            print('Unable to save robot pose, fast reset disabled.')
+            self.fast_reset = False
 
     # first update to be run
     def pre_update(self):
         self.sim.update()
-        self.update_pose(True)
-        self.update_sensors(True)
+        self.update_state(True)
         self.sim.update()
-        self.update_pose(False)
-        self.update_sensors(False)
+        self.update_state(False)
         self.calculate_limits()
 
     ## main update
@@ -127,74 +185,98 @@ class Robbie(object):
         tick_time = now_tick - self.last_tick
         self.last_tick = now_tick
 
-        # update robot feet position
-        self.move_feet(tick_time)
+        rpc_start = time()
+        if self.packed:
+            # move feet, update simulator and read state on server side
+            self.step_packed(tick_time)
+        else:
+            # update robot feet position
+            self.move_feet(tick_time)
+
+            # update simulator after rotations
+            self.sim.update()
+            self.update_state(False)
+        self.rpc_time = time() - rpc_start
 
-        # update simulator after rotations
-        self.sim.update()
-        self.update_pose(False)
-        self.update_sensors(False)
         self.check_stuck(tick_time)
         self.check_fallen()
 
+    ## update pose and sensors from grouped simulator data
+    def update_state(self, first_time):
+        abs_poses = self.sim.get_group_state([self.handle] + self.foot_tips, GROUP_ABS_POSE, first_time)
+        rel_poses = self.sim.get_group_state(self.foot_targets, GROUP_REL_POSE, first_time)
+        joints = self.sim.get_group_state(self.robot_joints, GROUP_JOINT_STATE, first_time)
+        abs_poses = np.asarray(abs_poses)
+        self.update_pose(abs_poses[0])
+        self.update_sensors(abs_poses[1:, :3], np.asarray(rel_poses)[:, :3], np.asarray(joints)[:, 0])
+
     ## update pose
-    def update_pose(self, first_time):
-        self.last_position = copy.copy(self.position)
-        self.last_orientation = copy.copy(self.orientation)
-        self.position = self.sim.get_position(self.handle, first_time)
-        self.orientation = self.sim.get_orientation(self.handle, first_time)
+    def update_pose(self, pose):
+        self.last_position[:] = self.position
+        self.last_orientation[:] = self.orientation
+        self.position[:] = pose[:3]
+        self.orientation[:] = pose[3:6]
 
     ## update sensors
-    def update_sensors(self, first_time):
-        self.joints_position = [self.sim.get_joint_position(i, first_time) for i in self.robot_joints]
-        self.tips_position = [self.sim.get_position(i, first_time) for i in self.foot_tips]
-        self.tips_rel_position = [self.sim.get_position(i, first_time, True) for i in self.foot_targets]
+    def update_sensors(self, tips_positions, targets_positions, joints_positions):
+        self.joints_position[:] = joints_positions
+        self.tips_position[:] = tips_positions
+        self.tips_rel_position[:] = targets_positions
+
+    ## move feet, update simulator and read state in a single script call
+    def step_packed(self, tick_time):
+        self.step_input[:-1] = self.tips_speed
+        self.step_input[-1] = tick_time
+        data = np.asarray(self.sim.step_packed(REMOTE_API_OBJ, REMOTE_API_STEP, self.step_input), np.float32)
+        if len(data) < PACKED_DIM:
+            raise Exception('Unexpected reply from step script!')
+
+        # unpack: pose (6), tips (4 * 3), targets (4 * 3) and joints (13)
+        self.update_pose(data[:6])
+        self.update_sensors(data[6:18].reshape(-1, 3), data[18:30].reshape(-1, 3), data[30:PACKED_DIM])
 
     ## move robot feet targets
     def move_feet(self, tick_time):
-        for i, foot_target in enumerate(self.foot_targets):
-            index = i * 2
-            tick_move = MAX_SPEED * tick_time
+        tick_move = MAX_SPEED * tick_time
 
-            # calculate wanted values
-            target_delta = [0] * 3
-            target_delta[0] = 0
-            target_delta[1] = self.tips_speed[index] * tick_move
-            target_delta[2] = self.tips_speed[index + 1] * tick_move
+        # calculate wanted values (feet only move on y and z axis) and clamp them
+        self.new_rel_position[:] = self.tips_rel_position
+        self.new_rel_position[:, 1:] += self.tips_speed.reshape(-1, 2) * tick_move
+        np.clip(self.new_rel_position, self.min_positions, self.max_positions, out=self.new_rel_position)
 
-            # clamp values
-            new_rel_position = [a + b for a, b in zip(self.tips_rel_position[i], target_delta)]
-            for j, _ in enumerate(new_rel_position):
-                new_rel_position[j] = min(new_rel_position[j], self.max_positions[i][j])
-                new_rel_position[j] = max(new_rel_position[j], self.min_positions[i][j])
+        # send all feet targets in the same packet
+        with self.sim.batch():
+            for i, foot_target in enumerate(self.foot_targets):
+                self.sim.set_position(foot_target, self.new_rel_position[i], True)
 
-            self.sim.set_position(foot_target, new_rel_position, True)
-
-    ## return robot current state
+    ## return robot current state, as a (1, STATES_DIM) array reused every
+    ## other call (act calls it too): it is valid until the second next
+    ## call, and must be copied to be kept longer
     def get_state(self):
-        state = []
-        for tip_position in self.tips_position:
-            relative_position = [a - b for a, b in zip(self.position, tip_position)]
-            state += relative_position  # 12 states (4 feet tips position 3 axis)
-        state += self.tips_speed        # 8 states (4 feet targets speed 2 axis)
-        state += self.joints_position   # 13 states (passive joints position)
-        state += self.orientation       # 3 states (robot orientation 3 axis)
-        return state                    # total: 36 states
+        state = self.states[self.state_index]
+        self.state_index = 1 - self.state_index
+        return self.fill_state(state)
+
+    ## write robot current state on a (1, STATES_DIM) array
+    def fill_state(self, state):
+        np.subtract(self.position, self.tips_position, out=self.tips_offset)
+        state[0, 0:12] = self.tips_offset.ravel()   # 12 states (4 feet tips position 3 axis)
+        state[0, 12:20] = self.tips_speed           # 8 states (4 feet targets speed 2 axis)
+        state[0, 20:33] = self.joints_position      # 13 states (passive joints position)
+        state[0, 33:36] = self.orientation          # 3 states (robot orientation 3 axis)
+        return state                                # total: 36 states
 
     ## return current state reward
     def get_reward(self):
         # start with neutral reward
         reward = 0
 
-        # get position and orientation diff
-        diff_position = [a - b for a, b in zip(self.position, self.last_position)]
-        diff_orientation = [a - b for a, b in zip(self.orientation, self.last_orientation)]
-
-        # calculate distance
-        distance = math.sqrt(math.pow(diff_position[0], 2) + math.pow(diff_position[1], 2))
+        # get position diff and distance
+        diff_position = self.position - self.last_position
+        distance = math.hypot(diff_position[0], diff_position[1])
 
         # calculate diff angle
-        diff_angle = diff_orientation[2]
+        diff_angle = float(self.orientation[2] - self.last_orientation[2])
         if diff_angle > math.pi:
             diff_angle -= 2 * math.pi
         elif diff_angle < -math.pi:
@@ -203,12 +285,11 @@ class Robbie(object):
 
         # calculate direction
         last_angle = self.last_orientation[2]
-        angle_vector = [-math.sin(last_angle), math.cos(last_angle), 0]
-        dot_product = angle_vector[0] * diff_position[0] + angle_vector[1] * diff_position[1]
+        dot_product = -math.sin(last_angle) * diff_position[0] + math.cos(last_angle) * diff_position[1]
         direction = math.copysign(1, dot_product)
 
-        # calculate if targets have same speed than last frame
-        same_speeds = [math.copysign(1, a) == math.copysign(1, b) for a, b in zip(self.tips_speed, self.last_speed)]
+        # count targets having same speed than last frame
+        same_speeds = np.count_nonzero(np.signbit(self.tips_speed) == np.signbit(self.last_speed))
 
         # reward for getting far or penalty for going backwards
         if direction == 1:
@@ -220,9 +301,7 @@ class Robbie(object):
         reward += diff_angle_deg * ROTATION_PENALTY
 
         # reward for having same speed as last frame
-        for same_speed in same_speeds:
-            if same_speed:
-                reward += CONTINUOUS_REWARD
+        reward += same_speeds * CONTINUOUS_REWARD
 
         # penalty for getting stuck
         if self.is_stuck:
@@ -236,55 +315,54 @@ class Robbie(object):
         if self.has_stopped:
             reward += STOP_PENALTY
 
-        return reward
+        return float(reward)
 
     ## check if robot didn't move for some time
     def check_stuck(self, tick_time):
-        is_close = True
-        for i in range(3):
-            diff_pos = abs(self.stuck_position[i] - self.position[i])
-            if diff_pos >= STUCK_MARGIN:
-                is_close = False
-                break
+        is_close = np.all(np.abs(self.stuck_position - self.position) < STUCK_MARGIN)
         if is_close:
             self.stuck_time += tick_time
             self.has_stopped = True
             self.is_stuck = self.stuck_time >= STUCK_TIMEOUT
         else:
             self.stuck_time = 0
-            self.stuck_position = self.position
+            self.stuck_position[:] = self.position
             self.has_stopped = False
             self.is_stuck = False
 
     ## check if robot has fallen
     def check_fallen(self):
-        self.has_fallen = self.position[2] < FALL_HEIGHT
+        self.has_fallen = bool(self.position[2] < FALL_HEIGHT)
 
     ## calculate min and max position for each foot
     def calculate_limits(self):
-        self.init_rel_position = copy.copy(self.tips_rel_position)
-        for i, rel_position in enumerate(self.init_rel_position):
-            is_front_foot = (i % 2 == 0)
-            max_limit = FRONT_MAX_LIMITS if is_front_foot else BACK_MAX_LIMITS
-            min_limit = FRONT_MIN_LIMITS if is_front_foot else BACK_MIN_LIMITS
-            self.max_positions[i] = [a + b for a, b in zip(rel_position, max_limit)]
-            self.min_positions[i] = [a + b for a, b in zip(rel_position, min_limit)]
+        self.init_rel_position[:] = self.tips_rel_position
+        np.add(self.init_rel_position, MAX_LIMITS, out=self.max_positions)
+        np.add(self.init_rel_position, MIN_LIMITS, out=self.min_positions)
+
+        # step script clamps feet on server side
+        if self.packed:
+            limits = np.concatenate((self.min_positions.ravel(), self.max_positions.ravel()))
+            self.sim.call_script(REMOTE_API_OBJ, REMOTE_API_LIMITS, limits)
 
     ## exectute actions on robot
     def act(self, actions):
+        start_time = time()
+
         # perform actions
-        self.last_speed = copy.copy(self.tips_speed)
-        for i, action in enumerate(actions):
-            self.tips_speed[i] = action * MAX_SPEED
+        self.last_speed[:] = self.tips_speed
+        np.multiply(actions, MAX_SPEED, out=self.tips_speed, casting='unsafe')
 
         # update robot on simulator
         self.update()
 
         # check if should finish
-        done = self.is_stuck or self.has_fallen
+        done = bool(self.is_stuck or self.has_fallen)
 
         # return new state
-        return self.get_state(), self.get_reward(), done
+        state, reward = self.get_state(), self.get_reward()
+        self.act_time = time() - start_time
+        return state, reward, done
 
     @staticmethod
     ## return states and actions dimensions
@@ -293,8 +371,9 @@ class Robbie(object):
 
     ### [debug] robot pose
     def print_pose(self):
-        print(self.position + self.orientation)
+        print(np.concatenate((self.position, self.orientation)))
 
-    ### [debug] robot state
+    ### [debug] robot state (on a new array, so states returned before
+    ### stay valid)
     def print_state(self):
-        print(self.get_state())
+        print(self.fill_state(np.zeros((1, STATES_DIM), np.float32)))
@@ -0,0 +1,51 @@
+from time import time
+start_time = time()
+
+from ai_utils.numpy_actor import load_policy
+from robbie import Robbie
+from simulator import Simulator
+
+# simulator constants
+SIMULATOR_PORT = 25000
+
+# running constants
+POLICY_PATH = './aidata/actor.npz' # written by export_policy.py
+MAX_EPISODES = 1
+MAX_STEPS = 200
+
+## run an exported policy, without tensorflow
+def run_policy():
+    # connect to vrep simulator
+    sim = Simulator("127.0.0.1", SIMULATOR_PORT)
+    sim.connect()
+
+    # get robbie instance and the policy
+    robbie = Robbie(sim, "Robbie")
+    policy = load_policy(POLICY_PATH)
+
+    print('Started in ' + str(time() - start_time) + ' seconds.')
+
+    for episode in range(MAX_EPISODES):
+        robbie.reset_robot()
+        state = robbie.get_state()
+
+        total_reward = 0.
+        for t in range(MAX_STEPS):
+            actions = policy.predict(state)
+            state, reward, done = robbie.act(actions[0])
+            total_reward += reward
+
+            if done:
+                print('Robot was stuck. Resetting scene.')
+                break
+
+        print('*********************************************')
+        print('\tEPISODE: ' + str(episode))
+        print('\tTOTAL REWARD: ' + str(total_reward))
+        print('*********************************************')
+
+    # disconnect from simulator
+    sim.disconnect()
+
+if __name__ == "__main__":
+    run_policy()
@@ -1,17 +1,54 @@
+import ctypes as ct
+from contextlib import contextmanager
+import json
+from time import time
+import numpy as np
 import vrep
+import profiler
 
 # response values
 ERROR = -1
 OK = 1
 
+# object group data types (see simxGetObjectGroupData)
+GROUP_NAMES = 0         # object names
+GROUP_ABS_POSE = 9      # absolute position and orientation
+GROUP_REL_POSE = 10     # position and orientation relative to parent
+GROUP_JOINT_STATE = 15  # joint position and force/torque
+
+# floats per object for each group data type
+GROUP_STRIDES = {GROUP_ABS_POSE: 6, GROUP_REL_POSE: 6, GROUP_JOINT_STATE: 2}
+
 class Simulator(object):
-    def __init__(self, ip, port):
+    ##
+    ##  -> profile:         profile remote API commands (no cost when off);
+    ##  -> profile_path:    .jsonl file of dumped profiles (None prints them);
+    ##
+    def __init__(self, ip, port, profile=False, profile_path=None):
         self.id = -1
         self.ip = ip
         self.port = port
 
+        # object handles keyed by scene and name, kept across reconnects
+        self.handles = {}
+        self.scene_id = ERROR
+
+        # batched commands counters
+        self.batching = False
+        self.batch_commands = 0
+        self.flushes = 0
+        self.flushed_commands = 0
+        self.last_flush = 0
+        self.accessors = {}
+
+        # remote API commands profile, kept across reconnects
+        self.profile = profiler.Profile() if profile else None
+        self.profile_path = profile_path
+
     def connect(self):
         self.id = vrep.simxStart(self.ip, self.port, True, False, 2000, 5)
+        if self.profile is not None and self.id != ERROR:
+            profiler.register(self.id, self.profile)
         vrep.simxSynchronous(self.id, True)
 
         if self.id == ERROR:
@@ -22,6 +59,31 @@ class Simulator(object):
     def disconnect(self):
         if self.id is not ERROR:
             vrep.simxFinish(self.id)
+            if self.profile is not None:
+                profiler.unregister(self.id)
+
+    ## return commands profile and connection values, None when not profiling
+    def get_profile(self):
+        if self.profile is None:
+            return None
+
+        report = {'port': self.port, 'seconds': time() - self.profile.start_time,
+                  'commands': self.profile.report()}
+        report.update(profiler.client_info(self.id))
+        return report
+
+    ## write (or print) the profile since the last dump and start again
+    def dump_profile(self):
+        report = self.get_profile()
+        if report is None:
+            return
+
+        if self.profile_path is not None:
+            with open(self.profile_path, 'a') as f:
+                f.write(json.dumps(report) + '\n')
+        else:
+            profiler.print_report(report)
+        self.profile.reset()
 
     def pause(self):
         if self.id is not ERROR:
@@ -31,6 +93,35 @@ class Simulator(object):
         if self.id is not ERROR:
             vrep.simxPauseCommunication(self.id, False)
 
+    ## queue every command sent inside the block and send them as one packet
+    @contextmanager
+    def batch(self):
+        if self.batching:
+            yield self
+            return
+
+        self.pause()
+        self.batching = True
+        self.batch_commands = 0
+        try:
+            yield self
+        finally:
+            self.batching = False
+            self.resume()
+            self.flushes += 1
+            self.flushed_commands += self.batch_commands
+            self.last_flush = self.batch_commands
+
+    def count_command(self):
+        if self.batching:
+            self.batch_commands += 1
+
+    ## return how many commands were sent in batches
+    def get_batch_stats(self):
+        average = self.flushed_commands / float(self.flushes) if self.flushes else 0
+        return {'flushes': self.flushes, 'commands': self.flushed_commands,
+                'last': self.last_flush, 'average': average}
+
     def update(self):
         if self.id is not ERROR:
             vrep.simxSynchronousTrigger(self.id)
@@ -41,14 +132,72 @@ class Simulator(object):
                 self.id, object_name, vrep.sim_scripttype_customizationscript,
                 function_name, [], [], [], bytearray(), vrep.simx_opmode_blocking)
 
+    def call_script(self, object_name, function_name, floats):
+        status, _, data, _, _ = vrep.simxCallScriptFunctionArray(
+            self.id, object_name, vrep.sim_scripttype_customizationscript,
+            function_name, [], floats, [], bytearray(), vrep.simx_opmode_blocking)
+
+        # missing functions are reported as remote errors
+        if status != vrep.simx_return_ok:
+            raise Exception('Unable to call script function!')
+
+        return data
+
+    def step_packed(self, object_name, function_name, floats):
+        # script applies the given floats and replies with the packed state
+        data = self.call_script(object_name, function_name, floats)
+        # advance simulation with the new values
+        self.update()
+
+        return data
+
+    ## return id of the scene on the server, changed whenever a scene is loaded
+    def get_scene_id(self):
+        status, scene_id = vrep.simxGetInMessageInfo(self.id, vrep.simx_headeroffset_scene_id)
+
+        return scene_id if status is not ERROR else ERROR
+
+    ## resolve every object handle of current scene
+    def load_handles(self):
+        # names and handles of every object in a single call
+        status, handles, _, _, names = vrep.simxGetObjectGroupDataArray(
+            self.id, vrep.sim_appobj_object_type, GROUP_NAMES, vrep.simx_opmode_blocking)
+
+        # handles are then resolved one by one
+        if status != vrep.simx_return_ok:
+            return
+
+        # drop handles of other scenes
+        scene_id = self.get_scene_id()
+        if scene_id != self.scene_id:
+            self.handles.clear()
+            self.scene_id = scene_id
+
+        for name, handle in zip(names, handles):
+            self.handles[(scene_id, name)] = int(handle)
+
     def get_handle(self, name):
-        status, handle = vrep.simxGetObjectHandle(
-            self.id, name, vrep.simx_opmode_oneshot_wait)
+        if (self.get_scene_id(), name) not in self.handles:
+            self.load_handles()
 
-        if status is ERROR:
-            raise Exception('Unable to receive handle!')
+        # scene id is only known once a reply is received (e.g. by
+        # load_handles on a fresh connection)
+        key = (self.get_scene_id(), name)
+
+        # fall back to a single query for names not listed by the scene
+        if key not in self.handles:
+            status, handle = vrep.simxGetObjectHandle(
+                self.id, name, vrep.simx_opmode_oneshot_wait)
+
+            if status != vrep.simx_return_ok:
+                raise Exception('Unable to receive handle!')
 
-        return handle
+            self.handles[key] = handle
+
+        return self.handles[key]
+
+    def get_handles(self, names):
+        return [self.get_handle(name) for name in names]
 
     def read_prox_sensor(self, handle, first_call=False):
         opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
@@ -100,24 +249,134 @@ class Simulator(object):
 
         return pos
 
+    def get_group_state(self, handles, data_type, first_call=False):
+        opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
+        # joint data only exists for joints, so keep the reply small
+        if data_type == GROUP_JOINT_STATE:
+            object_type = vrep.sim_object_joint_type
+        else:
+            object_type = vrep.sim_appobj_object_type
+        # return data of every object of a type in a single reply
+        status, group_handles, _, data, _ = vrep.simxGetObjectGroupDataArray(
+            self.id, object_type, data_type, opmode)
+
+        if status is ERROR:
+            raise Exception('Unable to receive group data!')
+
+        # pick the rows of the wanted handles, in the given order
+        stride = GROUP_STRIDES[data_type]
+        rows = np.zeros((len(handles), stride), np.float32)
+        if len(group_handles):
+            data = data.reshape(-1, stride)
+            order = np.argsort(group_handles)
+            index = np.searchsorted(group_handles, handles, sorter=order)
+            index = order[np.minimum(index, len(order) - 1)]
+            found = group_handles[index] == handles
+            rows[found] = data[index[found]]
+
+        return rows
+
+    def get_accessor(self, handle):
+        # accessors are kept, so their buffers are allocated once per handle
+        if handle not in self.accessors:
+            self.accessors[handle] = ObjectAccessor(self, handle)
+
+        return self.accessors[handle]
+
     def set_position(self, handle, pos, relative=False):
-        relative_mode = vrep.sim_handle_parent if relative else -1
-        if self.id is not ERROR:
-            vrep.simxSetObjectPosition(
-                self.id, handle, relative_mode, pos, vrep.simx_opmode_oneshot)
+        self.count_command()
+        self.get_accessor(handle).set_position(pos, relative)
 
     def set_orientation(self, handle, ori, relative=False):
-        relative_mode = vrep.sim_handle_parent if relative else -1
-        if self.id is not ERROR:
-            vrep.simxSetObjectOrientation(
-                self.id, handle, relative_mode, ori, vrep.simx_opmode_oneshot)
+        self.count_command()
+        self.get_accessor(handle).set_orientation(ori, relative)
 
     def set_joint_position(self, handle, pos):
+        self.count_command()
         if self.id is not ERROR:
             vrep.simxSetJointPosition(
                 self.id, handle, pos, vrep.simx_opmode_oneshot)
 
     def set_joint_target_velocity(self, handle, vel):
+        self.count_command()
         if self.id is not ERROR:
             vrep.simxSetJointTargetVelocity(
                 self.id, handle, vel, vrep.simx_opmode_streaming)
+
+class ObjectAccessor(object):
+    ## remote API calls bound to an object handle, reading and writing into
+    ## ctypes buffers allocated once and exposed as numpy views
+    def __init__(self, sim, handle):
+        self.sim = sim
+        self.handle = handle
+
+        # ctypes buffers
+        self.c_position = (ct.c_float * 3)()
+        self.c_orientation = (ct.c_float * 3)()
+        self.c_linear = (ct.c_float * 3)()
+        self.c_angular = (ct.c_float * 3)()
+        self.c_joint = (ct.c_float * 1)()
+        self.c_target = (ct.c_float * 3)()
+
+        # numpy views of the buffers, updated in place by each call
+        self.position = np.ctypeslib.as_array(self.c_position)
+        self.orientation = np.ctypeslib.as_array(self.c_orientation)
+        self.linear = np.ctypeslib.as_array(self.c_linear)
+        self.angular = np.ctypeslib.as_array(self.c_angular)
+        self.joint = np.ctypeslib.as_array(self.c_joint)
+        self.target = np.ctypeslib.as_array(self.c_target)
+
+    def get_position(self, first_call=False, relative=False):
+        opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
+        relative_mode = vrep.sim_handle_parent if relative else -1
+        status = vrep.c_GetObjectPosition(
+            self.sim.id, self.handle, relative_mode, self.c_position, opmode)
+
+        if status is ERROR:
+            raise Exception('Unable to receive handle!')
+
+        return self.position
+
+    def get_orientation(self, first_call=False, relative=False):
+        opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
+        relative_mode = vrep.sim_handle_parent if relative else -1
+        status = vrep.c_GetObjectOrientation(
+            self.sim.id, self.handle, relative_mode, self.c_orientation, opmode)
+
+        if status is ERROR:
+            raise Exception('Unable to receive handle!')
+
+        return self.orientation
+
+    def get_velocity(self, first_call=False):
+        opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
+        status = vrep.c_GetObjectVelocity(
+            self.sim.id, self.handle, self.c_linear, self.c_angular, opmode)
+
+        if status is ERROR:
+            raise Exception('Unable to receive handle!')
+
+        return self.linear, self.angular
+
+    def get_joint_position(self, first_call=False):
+        opmode = vrep.simx_opmode_streaming if first_call else vrep.simx_opmode_buffer
+        status = vrep.c_GetJointPosition(self.sim.id, self.handle, self.c_joint, opmode)
+
+        if status is ERROR:
+            raise Exception('Unable to receive handle!')
+
+        return self.joint[0]
+
+    def set_position(self, pos, relative=False):
+        relative_mode = vrep.sim_handle_parent if relative else -1
+        self.target[:] = pos
+        if self.sim.id is not ERROR:
+            vrep.c_SetObjectPosition(
+                self.sim.id, self.handle, relative_mode, self.c_target, vrep.simx_opmode_oneshot)
+
+    def set_orientation(self, ori, relative=False):
+        relative_mode = vrep.sim_handle_parent if relative else -1
+        self.target[:] = ori
+        if self.sim.id is not ERROR:
+            vrep.c_SetObjectOrientation(
+                self.sim.id, self.handle, relative_mode, self.c_target, vrep.simx_opmode_oneshot)
@@ -23,7 +23,7 @@ def test_robot():
         # send actions to robot
         actions = [random.randrange(-1, 1) for _ in range(8)]
         new_state, reward, done = robbie.act(actions)
-        print(new_state + [reward] + [done])
+        print(new_state[0].tolist() + [reward] + [done])
 
         # get generation execution time
         gen_time = time() - start_time
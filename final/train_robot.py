@@ -1,35 +1,76 @@
 from ddpg import ddpg
 from robbie import Robbie
 from simulator import Simulator
+from vec_robbie import VecRobbie
 
 # simulator constants
 SIMULATOR_PORT = 25000
+FAST_RESET = True # restore robot pose without reconnecting (see remote_api.lua)
+NUM_SIMULATORS = 1 # simulators stepped at once, on consecutive ports
+NUM_COLLECTORS = 0 # collector processes, one simulator each (0 trains in process)
+PROFILE = False # profile remote API commands of each episode
+PROFILE_PATH = './aidata/profile.jsonl' # per-episode profiles (None prints them)
 
 # training constants
 MAX_EPISODES = 10000
 MAX_STEPS = 50
+MAX_UPDATES = 1000000 # learner updates when training with collectors
+BUFFER_PATH = './aidata/replay/' # replay buffer files, reopened on restart
+PREFETCH = 2 # minibatches sampled ahead on a background thread
+CHECKPOINT_PATH = './aidata/checkpoints/' # whole training state, resumed on restart
+METRICS_PATH = './aidata/metrics.jsonl' # per-episode metrics (.jsonl or .csv)
+PRINT_INTERVAL = 0. # minimum seconds between printed reports (None never prints)
+UTD_RATIO = 1. # gradient updates per robot step
+WARMUP = 1000 # transitions stored before the first update
+UPDATE_EVERY = 1 # robot steps between bunches of updates
 
-def train_robot():
-    # connect to vrep simulator
-    sim = Simulator("127.0.0.1", SIMULATOR_PORT)
+## connect a collector to its own simulator and get its robbie
+def make_robbie(index):
+    sim = Simulator("127.0.0.1", SIMULATOR_PORT + index, PROFILE, PROFILE_PATH)
     sim.connect()
+    return Robbie(sim, "Robbie", fast_reset=FAST_RESET)
+
+def train_distributed():
+    # the learner never steps a robot, collectors own the simulators
+    states_dim, actions_dim = Robbie.get_dimensions()
+    robbie_ai = ddpg(None, states_dim, actions_dim, buffer_path=BUFFER_PATH,
+        prefetch=PREFETCH, checkpoint_path=CHECKPOINT_PATH,
+        metrics_path=METRICS_PATH, print_interval=PRINT_INTERVAL)
+
+    # train robot
+    robbie_ai.train_distributed(make_robbie, NUM_COLLECTORS, MAX_UPDATES, MAX_STEPS)
+
+def train_robot():
+    # connect to vrep simulators
+    sims = [Simulator("127.0.0.1", SIMULATOR_PORT + i, PROFILE, PROFILE_PATH)
+            for i in range(NUM_SIMULATORS)]
+    for sim in sims:
+        sim.connect()
 
-    # get robbie instance and reset it
-    robbie = Robbie(sim, "Robbie")
+    # get robbie instances and reset them
+    robbies = [Robbie(sim, "Robbie", fast_reset=FAST_RESET) for sim in sims]
+    robbie = robbies[0] if NUM_SIMULATORS == 1 else VecRobbie(robbies)
     robbie.reset_robot()
 
     # start AI
     states_dim, actions_dim = robbie.get_dimensions()
-    robbie_ai = ddpg(robbie, states_dim, actions_dim)
+    robbie_ai = ddpg(robbie, states_dim, actions_dim, buffer_path=BUFFER_PATH,
+        prefetch=PREFETCH, checkpoint_path=CHECKPOINT_PATH,
+        metrics_path=METRICS_PATH, print_interval=PRINT_INTERVAL)
 
     # train robot
-    robbie_ai.train(MAX_EPISODES, MAX_STEPS)
+    robbie_ai.train(MAX_EPISODES, MAX_STEPS, utd_ratio=UTD_RATIO, warmup=WARMUP,
+        update_every=UPDATE_EVERY)
 
     # run robot one time after training
     robbie_ai.run(1, MAX_STEPS)
 
-    # disconnect from simulator
-    sim.disconnect()
+    # disconnect from simulators
+    for sim in sims:
+        sim.disconnect()
 
 if __name__ == "__main__":
-    train_robot()
+    if NUM_COLLECTORS > 0:
+        train_distributed()
+    else:
+        train_robot()
@@ -0,0 +1,130 @@
+##
+## steps several robbies, each one on its own simulator, at the same time
+##
+
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+import numpy as np
+
+from robbie import Robbie
+
+class VecRobbie(object):
+    def __init__(self, robbies):
+        self.robbies = robbies
+        self.num_envs = len(robbies)
+
+        # remote API calls release the GIL, so threads step robbies concurrently
+        self.pool = ThreadPoolExecutor(max_workers=self.num_envs)
+
+        # state buffers, alternated so the last two states stay valid
+        states_dim, _ = self.get_dimensions()
+        self.states = np.zeros((2, self.num_envs, states_dim), np.float32)
+        self.state_index = 0
+
+        # last reset and act latencies, and act time on remote calls (of the
+        # slowest robot)
+        self.reset_time = 0
+        self.act_time = 0
+        self.rpc_time = 0
+
+    ## reset robots on their scenes (all of them by default)
+    def reset_robot(self, indices=None):
+        start_time = time()
+        if indices is None:
+            indices = range(self.num_envs)
+        list(self.pool.map(lambda i: self.robbies[i].reset_robot(), indices))
+        self.reset_time = time() - start_time
+
+    ## return robots current states stacked in a (num_envs, STATES_DIM) array
+    def get_state(self):
+        states = self.next_states()
+        for i, robbie in enumerate(self.robbies):
+            states[i] = robbie.get_state()[0]
+        return states
+
+    ## execute a row of actions on each robot
+    def act(self, actions):
+        start_time = time()
+        results = list(self.pool.map(lambda args: args[0].act(args[1]),
+                                     zip(self.robbies, actions)))
+
+        states = self.next_states()
+        rewards = np.zeros(self.num_envs, np.float32)
+        dones = np.zeros(self.num_envs, bool)
+        for i, (state, reward, done) in enumerate(results):
+            states[i] = state[0]
+            rewards[i] = reward
+            dones[i] = done
+
+        self.act_time = time() - start_time
+        self.rpc_time = max(robbie.rpc_time for robbie in self.robbies)
+        return states, rewards, dones
+
+    def next_states(self):
+        states = self.states[self.state_index]
+        self.state_index = 1 - self.state_index
+        return states
+
+    def close(self):
+        self.pool.shutdown()
+
+    @staticmethod
+    ## return states and actions dimensions
+    def get_dimensions():
+        return Robbie.get_dimensions()
+
+## check that stepping robbies together gives the same results as stepping
+## each one alone (robbie's clock only moves between steps, so every robot
+## sees the same tick times on any thread)
+def check_vec_robbie(num_envs=3, steps=10, tick=0.05):
+    import robbie as robbie_module
+    from fake_simulator import FakeSimulator
+
+    clock = [0.]
+    real_time = robbie_module.time
+    robbie_module.time = lambda: clock[0]
+    try:
+        def make_robbies():
+            robbies = []
+            for i in range(num_envs):
+                sim = FakeSimulator("127.0.0.1", 25000 + i, seed=i)
+                sim.connect()
+                robbies += [Robbie(sim, "Robbie")]
+            return robbies
+
+        vec_robbie = VecRobbie(make_robbies())
+        robbies = make_robbies()
+        vec_robbie.reset_robot()
+        for robbie in robbies:
+            robbie.reset_robot()
+
+        actions = np.random.RandomState(1337).uniform(-1, 1, (2*steps, num_envs, 8))
+        last_states = None
+        for t in range(2*steps):
+            # reset one robot only, half way
+            if t == steps:
+                vec_robbie.reset_robot([1])
+                robbies[1].reset_robot()
+
+            clock[0] += tick
+            states, rewards, dones = vec_robbie.act(actions[t])
+            if last_states is not None:
+                assert np.array_equal(last_states[0], last_states[1]), 'Last states were overwritten!'
+            last_states = (states, np.copy(states))
+
+            for i, robbie in enumerate(robbies):
+                state, reward, done = robbie.act(actions[t, i])
+                assert np.allclose(states[i], state[0]), 'States differ on step %d!' % t
+                assert np.isclose(rewards[i], reward), 'Rewards differ on step %d!' % t
+                assert dones[i] == done, 'Episode ends differ on step %d!' % t
+
+        assert states.shape == (num_envs, Robbie.get_dimensions()[0])
+        vec_robbie.close()
+    finally:
+        robbie_module.time = real_time
+
+## testing...
+if __name__ == "__main__":
+    check_vec_robbie()
+    print('Vectorized and single robbies match.')
@@ -27,9 +27,9 @@
 # This file was automatically created for V-REP release V3.3.2 on August 29th 2016
 
 import platform
-import struct
 import sys
 import ctypes as ct
+import numpy as np
 from vrepConst import *
 
 #load library
@@ -1434,48 +1434,188 @@ def simxPackInts(intList):
     '''
     Please have a look at the function description/documentation in the V-REP user manual
     '''
-    
+
+    s=np.asarray(intList, '<i4').tobytes()
     if sys.version_info[0] == 3:
-        s=bytes()
-        for i in range(len(intList)):
-            s=s+struct.pack('<i',intList[i])
         s=bytearray(s)
-    else:
-        s=''
-        for i in range(len(intList)):
-            s+=struct.pack('<i',intList[i])
     return s
 
-def simxUnpackInts(intsPackedInString):
+def simxUnpackInts(intsPackedInString, asList=True):
     '''
     Please have a look at the function description/documentation in the V-REP user manual
+    Returns a list (or a new int32 array if asList is not set)
     '''
-    b=[]
-    for i in range(int(len(intsPackedInString)/4)):
-        b.append(struct.unpack('<i',intsPackedInString[4*i:4*(i+1)])[0])
-    return b
+    b=np.frombuffer(intsPackedInString, '<i4', int(len(intsPackedInString)/4))
+    if asList:
+        return b.tolist()
+    return b.copy()
 
 def simxPackFloats(floatList):
     '''
     Please have a look at the function description/documentation in the V-REP user manual
     '''
 
+    s=np.asarray(floatList, '<f4').tobytes()
     if sys.version_info[0] == 3:
-        s=bytes()
-        for i in range(len(floatList)):
-            s=s+struct.pack('<f',floatList[i])
         s=bytearray(s)
-    else:
-        s=''
-        for i in range(len(floatList)):
-            s+=struct.pack('<f',floatList[i])
     return s
 
-def simxUnpackFloats(floatsPackedInString):
+def simxUnpackFloats(floatsPackedInString, asList=True):
     '''
     Please have a look at the function description/documentation in the V-REP user manual
+    Returns a list (or a new float32 array if asList is not set)
+    '''
+    b=np.frombuffer(floatsPackedInString, '<f4', int(len(floatsPackedInString)/4))
+    if asList:
+        return b.tolist()
+    return b.copy()
+
+#NumPy variants: results are copied once into arrays and inputs are passed without per element conversion
+def _arrayFromPointer(pointer, count, dtype):
+    '''
+    Copies count values pointed by a ctypes pointer into a new array (the pointed memory belongs to the remote API)
+    '''
+    if count <= 0:
+        return np.empty(0, dtype)
+    return np.ctypeslib.as_array(pointer, shape=(count,)).astype(dtype)
+
+def _stringsFromPointer(pointer, count):
+    '''
+    Splits count null terminated strings pointed by a ctypes pointer
+    '''
+    strings = []
+    address = ct.cast(pointer, ct.c_void_p).value
+    for i in range(count):
+        a = ct.string_at(address)
+        address += len(a) + 1 #skip null
+        if sys.version_info[0] == 3:
+            a=str(a,'utf-8')
+        strings.append(a)
+    return strings
+
+def _arrayInput(values, dtype, ctype):
+    '''
+    Returns a contiguous array of values (not copied if it already is one) and a ctypes pointer to it
+    '''
+    arr = np.ascontiguousarray(values, dtype)
+    return arr, arr.ctypes.data_as(ct.POINTER(ctype))
+
+def _bufferInput(buffer):
+    '''
+    Returns a contiguous byte array of a buffer, str or array and a ctypes pointer to it
+    '''
+    if (sys.version_info[0] == 3) and (type(buffer) is str):
+        buffer=buffer.encode('utf-8')
+    if isinstance(buffer, (bytes, bytearray, str)):
+        buffer = np.frombuffer(buffer, np.uint8)
+    return _arrayInput(buffer, np.uint8, ct.c_ubyte)
+
+def simxGetStringSignalArray(clientID, signalName, operationMode):
+    '''
+    Same as simxGetStringSignal, but returns the signal as an uint8 array
+    '''
+
+    signalLength = ct.c_int();
+    signalValue = ct.POINTER(ct.c_ubyte)()
+    if (sys.version_info[0] == 3) and (type(signalName) is str):
+        signalName=signalName.encode('utf-8')
+    ret = c_GetStringSignal(clientID, signalName, ct.byref(signalValue), ct.byref(signalLength), operationMode)
+
+    count = signalLength.value if ret == 0 else 0
+    return ret, _arrayFromPointer(signalValue, count, np.uint8)
+
+def simxGetAndClearStringSignalArray(clientID, signalName, operationMode):
+    '''
+    Same as simxGetAndClearStringSignal, but returns the signal as an uint8 array
+    '''
+
+    signalLength = ct.c_int();
+    signalValue = ct.POINTER(ct.c_ubyte)()
+    if (sys.version_info[0] == 3) and (type(signalName) is str):
+        signalName=signalName.encode('utf-8')
+    ret = c_GetAndClearStringSignal(clientID, signalName, ct.byref(signalValue), ct.byref(signalLength), operationMode)
+
+    count = signalLength.value if ret == 0 else 0
+    return ret, _arrayFromPointer(signalValue, count, np.uint8)
+
+def simxReadStringStreamArray(clientID, signalName, operationMode):
+    '''
+    Same as simxReadStringStream, but returns the stream as an uint8 array
+    '''
+
+    signalLength = ct.c_int();
+    signalValue = ct.POINTER(ct.c_ubyte)()
+    if (sys.version_info[0] == 3) and (type(signalName) is str):
+        signalName=signalName.encode('utf-8')
+    ret = c_ReadStringStream(clientID, signalName, ct.byref(signalValue), ct.byref(signalLength), operationMode)
+
+    count = signalLength.value if ret == 0 else 0
+    return ret, _arrayFromPointer(signalValue, count, np.uint8)
+
+def simxGetObjectGroupDataArray(clientID, objectType, dataType, operationMode):
+    '''
+    Same as simxGetObjectGroupData, but returns handles and int data as int32 arrays and float data as a float32 array
     '''
-    b=[]
-    for i in range(int(len(floatsPackedInString)/4)):
-        b.append(struct.unpack('<f',floatsPackedInString[4*i:4*(i+1)])[0])
-    return b
+
+    handlesC = ct.c_int()
+    handlesP = ct.POINTER(ct.c_int)()
+    intDataC = ct.c_int()
+    intDataP = ct.POINTER(ct.c_int)()
+    floatDataC = ct.c_int()
+    floatDataP = ct.POINTER(ct.c_float)()
+    stringDataC = ct.c_int()
+    stringDataP = ct.POINTER(ct.c_char)()
+    ret = c_GetObjectGroupData(clientID, objectType, dataType, ct.byref(handlesC), ct.byref(handlesP), ct.byref(intDataC), ct.byref(intDataP), ct.byref(floatDataC), ct.byref(floatDataP), ct.byref(stringDataC), ct.byref(stringDataP), operationMode)
+
+    if ret != 0:
+        handlesC.value = intDataC.value = floatDataC.value = stringDataC.value = 0
+    handles = _arrayFromPointer(handlesP, handlesC.value, np.int32)
+    intData = _arrayFromPointer(intDataP, intDataC.value, np.int32)
+    floatData = _arrayFromPointer(floatDataP, floatDataC.value, np.float32)
+    stringData = _stringsFromPointer(stringDataP, stringDataC.value)
+
+    return ret, handles, intData, floatData, stringData
+
+def simxCallScriptFunctionArray(clientID, scriptDescription, options, functionName, inputInts, inputFloats, inputStrings, inputBuffer, operationMode):
+    '''
+    Same as simxCallScriptFunction, but takes int32/float32 arrays (passed without copy when contiguous) and
+    returns int data as an int32 array, float data as a float32 array and the buffer as an uint8 array
+    '''
+
+    if sys.version_info[0] == 3:
+        if type(scriptDescription) is str:
+            scriptDescription=scriptDescription.encode('utf-8')
+        if type(functionName) is str:
+            functionName=functionName.encode('utf-8')
+    inInts, c_inInts = _arrayInput(inputInts, np.int32, ct.c_int)
+    inFloats, c_inFloats = _arrayInput(inputFloats, np.float32, ct.c_float)
+    inBuffer, c_inBuffer = _bufferInput(inputBuffer)
+
+    concatStr=''.encode('utf-8')
+    for i in range(len(inputStrings)):
+        a=inputStrings[i]
+        a=a+'\0'
+        if type(a) is str:
+            a=a.encode('utf-8')
+        concatStr=concatStr+a
+    c_inStrings = ct.create_string_buffer(concatStr, len(concatStr))
+
+    intDataC = ct.c_int()
+    intDataP = ct.POINTER(ct.c_int)()
+    floatDataC = ct.c_int()
+    floatDataP = ct.POINTER(ct.c_float)()
+    stringDataC = ct.c_int()
+    stringDataP = ct.POINTER(ct.c_char)()
+    bufferS = ct.c_int()
+    bufferP = ct.POINTER(ct.c_ubyte)()
+
+    ret = c_CallScriptFunction(clientID,scriptDescription,options,functionName,inInts.size,c_inInts,inFloats.size,c_inFloats,len(inputStrings),c_inStrings,inBuffer.size,c_inBuffer,ct.byref(intDataC),ct.byref(intDataP),ct.byref(floatDataC),ct.byref(floatDataP),ct.byref(stringDataC),ct.byref(stringDataP),ct.byref(bufferS),ct.byref(bufferP),operationMode)
+
+    if ret != 0:
+        intDataC.value = floatDataC.value = stringDataC.value = bufferS.value = 0
+    intDataOut = _arrayFromPointer(intDataP, intDataC.value, np.int32)
+    floatDataOut = _arrayFromPointer(floatDataP, floatDataC.value, np.float32)
+    stringDataOut = _stringsFromPointer(stringDataP, stringDataC.value)
+    bufferOut = _arrayFromPointer(bufferP, bufferS.value, np.uint8)
+
+    return ret, intDataOut, floatDataOut, stringDataOut, bufferOut